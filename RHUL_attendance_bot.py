@@ -11,12 +11,17 @@ import random
 import shutil
 import subprocess
 import zoneinfo  # For Python 3.9 and above
-import ntplib  # Used to check system time synchronization
+from preflight import PreflightCheck, run_preflight, gating_failures, format_report as format_preflight_report
+from chrome_supervisor import DEFAULT_MEMORY_BUDGET_MB, ChromeSupervisor
+from launch_profiles import DEFAULT_LAUNCH_PROFILE, LAUNCH_PROFILES, apply_launch_profile, chrome_arguments
 
 # Create a logger
 logger = logging.getLogger("attendance_bot")
 logger.setLevel(logging.DEBUG)
 
+# Concurrent Chrome instances when several profiles share one process
+DEFAULT_MAX_BROWSERS = 2
+
 def check_virtual_environment():
     if hasattr(sys, 'real_prefix') or (hasattr(sys, 'base_prefix') and sys.base_prefix != sys.prefix):
         logger.info("Running inside a virtual environment.")
@@ -26,25 +31,18 @@ def check_virtual_environment():
         sys.exit(1)
 
 def check_dependencies():
-    missing_packages = []
-    required_packages = []
     requirements_file = 'requirements.txt'
     if not os.path.exists(requirements_file):
         logger.error(f"Requirements file '{requirements_file}' not found.")
         logger.error(f"Please ensure the '{requirements_file}' file is in the same directory as the script.")
         sys.exit(1)
-    with open(requirements_file, 'r') as f:
-        required_packages = [line.strip() for line in f if line.strip()]
+    from dependency_check import check_cached
     try:
-        installed_packages_output = subprocess.check_output([sys.executable, '-m', 'pip', 'freeze']).decode()
-    except subprocess.CalledProcessError as e:
-        logger.error("Failed to get installed packages.")
+        # In-process importlib.metadata check, skipped when requirements and site-packages are unchanged
+        missing_packages = check_cached(requirements_file)
+    except Exception as e:
+        logger.error(f"Failed to check installed packages: {e}")
         sys.exit(1)
-    installed_packages = [pkg.lower().split('==')[0] for pkg in installed_packages_output.strip().split('\n') if pkg.strip()]
-    for pkg in required_packages:
-        pkg_name = pkg.lower().split('==')[0]
-        if pkg_name not in installed_packages:
-            missing_packages.append(pkg)
     if missing_packages:
         logger.error(f"Missing dependencies: {', '.join(missing_packages)}")
         logger.error("Please install the dependencies by running 'pip install -r requirements.txt'")
@@ -53,27 +51,165 @@ def check_dependencies():
         logger.info("All dependencies are installed.")
 
 def check_chrome_installed():
-    from selenium import webdriver
-    from selenium.webdriver.chrome.service import Service
-    from webdriver_manager.chrome import ChromeDriverManager
-    try:
-        options = webdriver.ChromeOptions()
-        options.add_argument("--headless")  # Run in headless mode for testing
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        driver.quit()
-        logger.info("Chrome and ChromeDriver are installed and working.")
-    except Exception as e:
-        logger.error(f"Failed to initialize Chrome WebDriver: {e}")
+    """Preflight: find Chrome and a matching chromedriver without launching a browser.
+
+    The first real launch (a pre-warm or an event) is what proves the pair works,
+    so a start with no events due never imports selenium or starts Chrome.
+    """
+    from driver_resolver import get_chrome_version, resolve_chromedriver
+    chrome_version = get_chrome_version()
+    driver_path = resolve_chromedriver()
+    if not chrome_version and not driver_path:
+        logger.error("Could not find Google Chrome or a cached ChromeDriver.")
         logger.error("Please ensure that Google Chrome is installed and accessible.")
         sys.exit(1)
+    if chrome_version:
+        logger.info(f"Found Chrome {chrome_version}; ChromeDriver: {driver_path or 'located by Selenium'}.")
+    else:
+        logger.warning(f"Could not read the Chrome version; using cached ChromeDriver {driver_path}.")
+
+def check_system_time():
+    import ntplib  # Used to check system time synchronization
+    from datetime import datetime, timezone
+    client = ntplib.NTPClient()
+    response = client.request('pool.ntp.org', timeout=5)
+    system_time = datetime.now(timezone.utc).timestamp()
+    ntp_time = response.tx_time
+    time_difference = abs(system_time - ntp_time)
+    if time_difference > 5:
+        logger.warning(f"System time is off by {time_difference} seconds. Consider synchronizing your clock.")
+    else:
+        logger.info("System time is synchronized with NTP server.")
+    return time_difference
+
+def fetch_update_status():
+    """Return True if origin/HEAD differs from the local commit."""
+    local_commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], timeout=10).decode().strip()
+    remote_commit = subprocess.check_output(['git', 'ls-remote', 'origin', 'HEAD'], timeout=15).decode().split()[0]
+    return local_commit != remote_commit
+
+def prompt_for_update():
+    logger.info("New update detected.")
+    # Prompt the user in the console
+    print("A new update is available. Do you want to update now? (y/n): ", end='')
+    user_input = input().strip().lower()
+    if user_input == '' or user_input == 'y':
+        logger.info("Updating the script...")
+        try:
+            subprocess.check_call(['git', 'pull'])
+        except Exception as e:
+            logger.error(f"Failed to update: {e}", exc_info=True)
+            return
+        logger.info("Update successful. Restarting the script...")
+        os.execv(sys.executable, [sys.executable] + sys.argv)
+    else:
+        logger.info("Skipping update. Continuing with the current version.")
+
+def get_single_ics_file(script_dir):
+    ics_folder = os.path.join(script_dir, 'ics')
+    if not os.path.exists(ics_folder):
+        os.makedirs(ics_folder, exist_ok=True)
+        logger.info(f"Created folder '{ics_folder}' as it did not exist.")
+
+    ics_files = [os.path.join(ics_folder, file) for file in os.listdir(ics_folder) if file.endswith('.ics')]
+    if len(ics_files) == 0:
+        logger.error("Error: No .ics file found.")
+        return None
+    elif len(ics_files) > 1:
+        logger.error("Error: Multiple .ics files found, please ensure only one file is in the ics folder.")
+        return None
+    else:
+        return ics_files[0]
+
+def load_calendar(file_path):
+    from ics import Calendar
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            calendar = Calendar(f.read())
+        return calendar
+    except FileNotFoundError:
+        logger.error(f"Calendar file not found: {file_path}")
+        return None
+    except Exception as e:
+        logger.error(f"Error loading calendar: {e}", exc_info=True)
+        return None
+
+def parse_calendar_events(file_path):
+    """Parse the timetable when the compiled cache is missing or stale."""
+    import ics_stream
+    try:
+        return list(ics_stream.iter_events(file_path))
+    except ValueError as e:
+        logger.warning(f"Streaming ics reader failed ({e}); falling back to full parser.")
+    calendar = load_calendar(file_path)
+    if not calendar:
+        raise ValueError(f"Could not parse calendar: {file_path}")
+    return [
+        (event.begin.to('UTC').datetime.timestamp(), event.end.to('UTC').datetime.timestamp(), event.name or '')
+        for event in calendar.events
+    ]
+
+def load_event_records(file_path):
+    import calendar_cache
+    try:
+        return calendar_cache.load_events(file_path, lambda: parse_calendar_events(file_path), logger=logger)
+    except Exception as e:
+        logger.error(f"Error loading calendar: {e}", exc_info=True)
+        return None
+
+def load_timetable(script_dir):
+    """Preflight check: locate the single .ics file and load its future events."""
+    ics_file = get_single_ics_file(script_dir)
+    if not ics_file:
+        raise RuntimeError("missing or multiple .ics files")
+    event_records = load_event_records(ics_file)
+    if event_records is None:
+        raise RuntimeError("failed to load calendar")
+    return ics_file, event_records
+
+def load_timetables(profiles):
+    """Preflight check: load every profile's timetable, skipping (and logging) profiles that fail."""
+    if len(profiles) == 1:
+        return {profiles[0].key: load_timetable(profiles[0].root_dir)}
+    timetables = {}
+    for profile in profiles:
+        try:
+            timetables[profile.key] = load_timetable(profile.root_dir)
+        except RuntimeError as e:
+            logger.error(f"Profile '{profile.key}': {e}; skipping it.")
+    if not timetables:
+        raise RuntimeError("no profile has a usable timetable")
+    return timetables
+
+def get_flag_value(flag):
+    """Return the argument following ``flag`` on the command line, or None."""
+    if flag in sys.argv:
+        index = sys.argv.index(flag)
+        if index + 1 < len(sys.argv):
+            return sys.argv[index + 1]
+    return None
 
 def main():
+    if '--import-profile' in sys.argv:
+        from import_profile import print_report
+        print_report()
+        return
+    # --headless: plain log output, no Rich screen or keyboard listener
+    headless = '--headless' in sys.argv
+    # --profiles DIR: serve every profile under DIR from this one process
+    profiles_dir = get_flag_value('--profiles')
+    if profiles_dir:
+        profiles_dir = os.path.abspath(profiles_dir)
+    max_browsers = int(get_flag_value('--max-browsers') or DEFAULT_MAX_BROWSERS)
+    memory_budget_mb = int(get_flag_value('--memory-budget') or DEFAULT_MEMORY_BUDGET_MB)
+    # --launch-profile fast|legacy: trimmed Chrome with request blocking, or the previous launch for comparison
+    launch_profile = get_flag_value('--launch-profile') or DEFAULT_LAUNCH_PROFILE
+    if launch_profile not in LAUNCH_PROFILES:
+        print(f"Unknown --launch-profile {launch_profile!r}; expected one of: {', '.join(LAUNCH_PROFILES)}")
+        sys.exit(1)
     script_dir = os.path.dirname(os.path.abspath(__file__))
     os.chdir(script_dir)
     check_virtual_environment()
-    check_dependencies()
-    check_chrome_installed()
 
     # First-run check: credentials and timetable
     credentials_path = os.path.join(script_dir, 'credentials.json')
@@ -93,49 +229,19 @@ def main():
             creds_ok = False
     # Check timetable
     timetable_ok = os.path.exists(ics_file)
-    if not creds_ok or not timetable_ok:
+    # Profiles in multi-profile mode are prepared beforehand; onboarding is interactive and single-user
+    if not profiles_dir and (not creds_ok or not timetable_ok):
         first_run = True
 
-    # Onboarding if first run
+    # Onboarding if first run: one browser covers MFA binding, timetable export and the Chrome check
+    chrome_verified = False
     if first_run:
         print('First run detected: running onboarding steps...')
-        # Run auto_login.py for first-time login
-        subprocess.run([sys.executable, os.path.join(script_dir, 'auto_login.py')])
-        # Run fetch_ics.py to get timetable
-        subprocess.run([sys.executable, os.path.join(script_dir, 'fetch_ics.py')])
+        check_dependencies()
+        from onboarding import run_onboarding
+        chrome_verified = run_onboarding()
 
-    # Now proceed to import the rest of the modules
-    import threading
-    import time
-    import random
-    import shutil
-    from datetime import datetime, timedelta, timezone
-    from ics import Calendar
-    from rich.console import Console
-    from rich.panel import Panel
-    from rich.live import Live
-    from rich.table import Table
-    from rich.align import Align
-    from rich.text import Text
-    from selenium import webdriver
-    from selenium.webdriver.chrome.service import Service
-    from selenium.webdriver.chrome.options import Options
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from webdriver_manager.chrome import ChromeDriverManager
-    from pynput import keyboard
-    from collections import deque
-    import zoneinfo  # For Python 3.9 and above
-    import ntplib  # Used to check system time synchronization
-    from auto_login import renew_login
-    from discord_broadcast import DiscordBroadcaster
-    # Reuse helpers but add custom MFA fallback below
-
-    # Initialize Rich console
-    console = Console()
-
-    # Reconfigure logger to add file handler and buffer handler
+    # Reconfigure logger to add file handler and buffer handler, before preflight logs anything
     logger.handlers = []  # Remove previous handlers
     logger.setLevel(logging.DEBUG)
     
@@ -147,6 +253,7 @@ def main():
     logger.addHandler(file_handler)
     
     # Create a fixed-size deque to store the latest five log messages
+    from collections import deque
     log_buffer = deque(maxlen=5)
     log_buffer_lock = threading.Lock()
     
@@ -173,67 +280,154 @@ def main():
                 self.buffer.append(log_entry)
 
     # Configure BufferLogHandler to display message content without timestamps and levels
-    buffer_handler = BufferLogHandler(log_buffer, log_buffer_lock, console)
+    buffer_handler = BufferLogHandler(log_buffer, log_buffer_lock, None)
     buffer_handler.setLevel(logging.DEBUG)
     buffer_formatter = logging.Formatter('%(message)s')
     buffer_handler.setFormatter(buffer_formatter)
     logger.addHandler(buffer_handler)
+    if headless:
+        # No Rich screen: log straight to the terminal instead
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setLevel(logging.INFO)
+        stream_handler.setFormatter(file_formatter)
+        logger.addHandler(stream_handler)
+    else:
+        # Until the Rich screen takes over, startup warnings and errors also reach the terminal
+        startup_handler = logging.StreamHandler(sys.stderr)
+        startup_handler.setLevel(logging.WARNING)
+        startup_handler.setFormatter(file_formatter)
+        logger.addHandler(startup_handler)
     
+    from profiles import default_profile, load_profiles
+    if profiles_dir:
+        try:
+            profiles, skipped = load_profiles(profiles_dir)
+        except RuntimeError as e:
+            logger.error(f"Cannot start multi-profile mode: {e}")
+            sys.exit(1)
+        for name in skipped:
+            logger.warning(f"Skipping profile '{name}': credentials.json or 2fa_config.json incomplete.")
+    else:
+        profiles = [default_profile(script_dir)]
+
+    # The update lookup may finish after startup has moved on; the prompt is only shown
+    # while the terminal is still ours, later results are just logged
+    update_lock = threading.Lock()
+    update_state = {'available': False, 'prompt_passed': False}
+
+    def update_checked(result):
+        with update_lock:
+            update_state['available'] = bool(result.ok and result.value)
+            late = update_state['prompt_passed']
+        if late and update_state['available']:
+            logger.info("A new update is available; restart the bot to install it.")
+
+    # Independent startup checks run side by side; only gating ones are waited for
+    checks = [
+        PreflightCheck('timetable', lambda: load_timetables(profiles), timeout=30),
+        PreflightCheck('updates', fetch_update_status, timeout=20, gating=False, on_done=update_checked),
+        PreflightCheck('system time', check_system_time, timeout=10, gating=False),
+    ]
+    if not first_run:
+        checks.insert(0, PreflightCheck('dependencies', check_dependencies, timeout=60))
+    if not chrome_verified:
+        checks.insert(0, PreflightCheck('chrome', check_chrome_installed, timeout=90))
+    preflight_results = run_preflight(checks)
+    print(format_preflight_report(preflight_results))
+    failures = gating_failures(preflight_results)
+    if failures:
+        for failure in failures:
+            logger.error(f"Startup check '{failure.name}' failed: {failure.error}")
+        sys.exit(1)
+    preflight = {result.name: result for result in preflight_results}
+    with update_lock:
+        update_state['prompt_passed'] = True
+        update_available = update_state['available']
+    if update_available:
+        prompt_for_update()
+    timetables = preflight['timetable'].value
+    profiles = [profile for profile in profiles if profile.key in timetables]
+    profiles_by_key = {profile.key: profile for profile in profiles}
+
+    # Now proceed to import the rest of the modules
+    import threading
+    import time
+    import random
+    import shutil
+    from datetime import datetime, timedelta, timezone
+    # Heavy modules load on first use, so a no-event day never imports selenium
+    from lazy_imports import LazyImport
+    Options = LazyImport('selenium.webdriver.chrome.options', 'Options')
+    By = LazyImport('selenium.webdriver.common.by', 'By')
+    WebDriverWait = LazyImport('selenium.webdriver.support.ui', 'WebDriverWait')
+    EC = LazyImport('selenium.webdriver.support.expected_conditions')
+    waits = LazyImport('waits')
+    from driver_resolver import start_chrome
+    from discord_broadcast import DiscordBroadcaster, close_all as close_broadcasters
+    from driver_pool import DriverPool
+    from profile_compactor import compact_profile, compaction_due
+    from attendance_executor import AttendanceExecutor
+    from event_scheduler import EventScheduler
+    from session_keepalive import SessionKeepalive
+    from timetable_watcher import TimetableWatcher
+
     # Initialize global variables
-    global start_time, attendance_success_count, counter_lock, events_lock, exit_event
+    global start_time, attendance_success_count, counter_lock, exit_event
     start_time = datetime.now()
     attendance_success_count = 0
     
     # Locks for thread-safe updates
     counter_lock = threading.Lock()
-    events_lock = threading.Lock()  # Lock for upcoming_events
     exit_event = threading.Event()  # Event to signal exit
 
-    def verify_login(driver, expected_url, max_wait_minutes=30):
-        initial_wait = 3
-        periodic_wait = 10
-        max_wait_seconds = max_wait_minutes * 60
-        elapsed_time = 0
-
-        time.sleep(initial_wait)
-        current_url = driver.current_url
-
-        if current_url == expected_url:
-            logger.info("Already logged in.")
-            return True
-        else:
-            logger.info("Need to login.")
-
-        while current_url != expected_url and elapsed_time < max_wait_seconds:
-            time.sleep(periodic_wait)
-            elapsed_time += periodic_wait
-            current_url = driver.current_url
-            if current_url == expected_url:
-                logger.info("Login detected.")
-                return True
-            else:
-                logger.info("Waiting for login...")
-        
-        logger.error(f"Login not detected after {max_wait_minutes} minutes.")
-        return False
-
     def initialize_webdriver(user_data_dir):
         chrome_options = Options()
         chrome_options.add_argument(f"user-data-dir={user_data_dir}")
-        chrome_options.add_argument("--log-level=3")
+        for argument in chrome_arguments(launch_profile):
+            chrome_options.add_argument(argument)
         chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
-        # Add more options if needed
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
 
         try:
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-            logger.info("Chrome WebDriver initialized successfully.")
-            return driver
+            driver = start_chrome(chrome_options)
         except Exception as e:
             logger.error(f"Failed to initialize Chrome WebDriver: {e}", exc_info=True)
             return None
+        try:
+            chrome_supervisor.register(driver)
+            apply_launch_profile(driver, launch_profile, logger=logger)
+        except Exception as e:
+            # Chrome is already running; don't leave it behind
+            logger.error(f"Failed to set up Chrome WebDriver: {e}", exc_info=True)
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            chrome_supervisor.release(driver)
+            return None
+        logger.info(f"Chrome WebDriver initialized successfully ({launch_profile} launch profile).")
+        return driver
+
+    for profile in profiles:
+        os.makedirs(profile.user_data_dir, exist_ok=True)
+    # Chromes orphaned by a crash or a failed quit() in an earlier run still hold memory and profile locks
+    chrome_supervisor = ChromeSupervisor(
+        pid_file=os.path.join(script_dir, 'chrome_pids.json'), memory_budget_mb=memory_budget_mb, logger=logger
+    )
+    chrome_supervisor.reap_stale()
+    # One warm Chrome per profile, reused between events, with at most max_browsers alive at once
+    driver_pool = DriverPool(
+        lambda key: initialize_webdriver(profiles_by_key[key].user_data_dir),
+        max_drivers=max_browsers,
+        logger=logger,
+        admit=chrome_supervisor.admit,
+        on_quit=chrome_supervisor.release,
+    )
+    # Browser jobs go through one bounded queue, one at a time per Chrome profile
+    attendance_executor = AttendanceExecutor(max_workers=max_browsers, logger=logger)
+
+    def profile_label(profile_key):
+        """Log prefix naming the profile; empty in single-profile mode."""
+        return '' if profile_key is None else f"[bold blue]{profiles_by_key[profile_key].nickname}[/bold blue] "
 
     def click_button_if_visible(driver, button_ids):
         button_flag = False
@@ -251,318 +445,125 @@ def main():
         logger.warning("No clickable button found.")
         return False
 
-    def click_by_xpath_contains_text(driver, text, timeout=10):
-        xpath = f"//*[self::button or self::a or self::div or self::span][contains(normalize-space(.), '{text}')]"
+    broadcasters = {}
+    ATTENDANCE_URL = "https://generalssb-prod.ec.royalholloway.ac.uk/BannerExtensibility/customPage/page/RHUL_Attendance_Student"
+    # Seconds before each trigger to launch Chrome and complete login off the critical path
+    PREWARM_LEAD_SECONDS = 120
+    # Upper bound for a login started by the background keepalive
+    KEEPALIVE_LOGIN_MINUTES = 5
+    # Only compact a Chrome profile when the next trigger is at least this far away
+    COMPACTION_QUIET_SECONDS = 30 * 60
+    # A compaction that was skipped (Chrome still open) is retried no more often than this
+    COMPACTION_RETRY_SECONDS = 60 * 60
+
+    def attempt_login(driver, expected_url, deadline, profile_key):
+        """Try automatic MS login using stored credentials and OTP, giving up at ``deadline``."""
         try:
-            elem = WebDriverWait(driver, timeout).until(
-                EC.element_to_be_clickable((By.XPATH, xpath))
+            from auto_login import renew_login
+            verified = renew_login(
+                driver, expected_url, deadline=deadline.timestamp(), profile_dir=profiles_by_key[profile_key].root_dir
             )
-            driver.execute_script("arguments[0].click();", elem)
-            logger.info(f"Clicked element with text contains: {text}")
-            return True
-        except Exception:
+            broadcaster = broadcasters.get(profile_key)
+            if verified and broadcaster:
+                broadcaster.notify_renew_login_success()
+            return verified
+        except Exception as e:
+            logger.error(f"Auto-login attempt failed: {e}", exc_info=True)
             return False
 
-    def click_with_retries(driver, candidates, attempts=6, delay=1.0):
-        """Try multiple selectors, with normal then JS click, retrying for dynamic UI."""
-        for attempt in range(1, attempts + 1):
-            for by, sel, label in candidates:
-                try:
-                    elems = driver.find_elements(by, sel)
-                    logger.info(f"[MFA click attempt {attempt}] selector={sel} label={label} found={len(elems)}")
-                    for elem in elems:
-                        if not elem.is_displayed() or not elem.is_enabled():
-                            continue
-                        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", elem)
-                        try:
-                            elem.click()
-                        except Exception:
-                            driver.execute_script("arguments[0].click();", elem)
-                        logger.info(f"[MFA click attempt {attempt}] clicked {label} via {sel}")
-                        return True
-                except Exception as e:
-                    logger.debug(f"[MFA click attempt {attempt}] selector={sel} error={e}")
-                    continue
-            time.sleep(delay)
-        logger.error("MFA click_with_retries exhausted without a click")
-        return False
-
-    def maybe_switch_to_login_iframe(driver):
-        """If login fields are inside an iframe, switch into it."""
-        try:
-            driver.switch_to.default_content()
-            frames = driver.find_elements(By.TAG_NAME, 'iframe')
-            for frame in frames:
-                try:
-                    driver.switch_to.frame(frame)
-                    if driver.find_elements(By.NAME, 'loginfmt') or driver.find_elements(By.ID, 'i0116'):
-                        return True
-                except Exception:
-                    driver.switch_to.default_content()
-            driver.switch_to.default_content()
-        except Exception:
-            driver.switch_to.default_content()
-        return False
-
-    def handle_kmsi(driver):
-        """Tick 'Don't show this again' (KMSI) and confirm Yes/Next."""
+    def open_attendance_page(driver, deadline, profile_key):
+        """Load (or refresh) the attendance page and log in if the session has lapsed."""
+        load_started = time.monotonic()
+        if driver.current_url == ATTENDANCE_URL:
+            driver.refresh()
+        else:
+            driver.get(ATTENDANCE_URL)
+        logger.info("Opened attendance page.")
         try:
-            kmsi_checkbox = driver.find_element(By.ID, "KmsiCheckboxField")
-            if kmsi_checkbox.is_displayed() and kmsi_checkbox.is_enabled() and not kmsi_checkbox.is_selected():
-                driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", kmsi_checkbox)
-                try:
-                    kmsi_checkbox.click()
-                except Exception:
-                    driver.execute_script("arguments[0].click();", kmsi_checkbox)
-                logger.info("Ticked KMSI checkbox")
-                time.sleep(0.3)
+            WebDriverWait(driver, 30).until(
+                lambda d: 'login.microsoftonline.com' in d.current_url
+                or d.find_elements(By.ID, "pbid-blockFoundHappeningNowAttending")
+            )
         except Exception:
             pass
-
-        # Confirm buttons
-        candidates = [
-            (By.ID, 'idSIButton9', 'idSIButton9'),
-            (By.CSS_SELECTOR, "input[type='submit'].button_primary", "button_primary submit"),
-            (By.XPATH, "//input[@type='submit' and (contains(@value,'Yes') or contains(@value,'是') or contains(@value,'继续') or contains(@value,'Next') or contains(@value,'Sign in'))]", "submit value match"),
-            (By.XPATH, "//button[contains(normalize-space(.), 'Yes') or contains(normalize-space(.), '是') or contains(normalize-space(.), '继续') or contains(normalize-space(.), 'Next') or contains(normalize-space(.), 'Sign in') or contains(normalize-space(.), 'Accept') or contains(normalize-space(.), '登录') or contains(normalize-space(.), '同意')]", "button text match"),
-        ]
-        if click_with_retries(driver, candidates, attempts=5, delay=0.6):
-            logger.info("Clicked KMSI confirmation button")
+        if driver.current_url == ATTENDANCE_URL and driver.find_elements(By.ID, "pbid-blockFoundHappeningNowAttending"):
+            log_time_to_block(load_started)
             return True
-        if click_by_xpath_contains_text(driver, 'Yes', timeout=3) or click_by_xpath_contains_text(driver, 'Next', timeout=3):
-            logger.info("Clicked KMSI confirmation via text fallback")
-            return True
-        logger.warning("KMSI confirmation button not found")
-        return False
-
-    def click_account_tile(driver, username):
-        """Handle account picker screen."""
-        candidates = [username, username.split('@')[0], 'Use another account', 'Other account']
-        for text in candidates:
-            if click_by_xpath_contains_text(driver, text, timeout=3):
-                return True
-        return False
-
-    def fill_ms_login(driver, username, password):
-        """Robust fill for Microsoft login page (prefers password-first)."""
-        try:
-            click_by_xpath_contains_text(driver, 'Accept', timeout=2)  # cookie banner if any
-            maybe_switch_to_login_iframe(driver)
-
-            # Account picker
-            click_account_tile(driver, username)
-
-            def visible_el(by, sel, wait=8):
-                try:
-                    el = WebDriverWait(driver, wait).until(EC.presence_of_element_located((by, sel)))
-                    if el.is_displayed():
-                        return el
-                except Exception:
-                    return None
-                return None
-
-            # Password first (id=i0118 or name=passwd)
-            pwd_input = visible_el(By.ID, 'i0118') or visible_el(By.NAME, 'passwd')
-
-            # Username only if visible (skip hidden moveOffScreen inputs)
-            user_input = None
-            for by, sel in [(By.NAME, 'loginfmt'), (By.ID, 'i0116')]:
-                el = visible_el(by, sel)
-                if el:
-                    user_input = el
-                    break
-
-            # If username visible, fill it then look for password again
-            if user_input:
-                user_input.clear()
-                driver.execute_script("arguments[0].focus();", user_input)
-                try:
-                    user_input.send_keys(username)
-                except Exception:
-                    driver.execute_script("arguments[0].value = arguments[1];", user_input, username)
-                try:
-                    btn = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.ID, 'idSIButton9')))
-                    driver.execute_script("arguments[0].click();", btn)
-                except Exception:
-                    pass
-                time.sleep(1.0)
-                pwd_input = visible_el(By.ID, 'i0118') or visible_el(By.NAME, 'passwd')
-
-            if pwd_input:
-                pwd_input.clear()
-                driver.execute_script("arguments[0].focus();", pwd_input)
-                try:
-                    pwd_input.send_keys(password)
-                except Exception:
-                    driver.execute_script("arguments[0].value = arguments[1];", pwd_input, password)
-                try:
-                    btn = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.ID, 'idSIButton9')))
-                    driver.execute_script("arguments[0].click();", btn)
-                except Exception:
-                    pass
-                time.sleep(1.0)
-                return True
-
-            logger.error("Password input not found or not interactable.")
+        # 尝试自动登录（凭证 + OTP），若已登录则快速通过
+        if not attempt_login(driver, ATTENDANCE_URL, deadline, profile_key):
             return False
-        except Exception as e:
-            logger.error(f"MS login fill failed: {e}", exc_info=True)
-            return False
-
-    def handle_mfa_code(driver):
-        """Fallback path: use verification code instead of Authenticator app."""
-        try:
-            maybe_switch_to_login_iframe(driver)
-            # Step 1: open alternative methods
-            try:
-                alt_link = WebDriverWait(driver, 6).until(
-                    EC.element_to_be_clickable((By.ID, 'signInAnotherWay'))
-                )
-                driver.execute_script("arguments[0].click();", alt_link)
-                logger.info("Clicked 'signInAnotherWay' link")
-            except Exception:
-                click_by_xpath_contains_text(driver, "I can't use my Microsoft Authenticator app right now", timeout=5)
-
-            # Step 2: choose verification code and wait for OTP input
-            candidates = [
-                (By.CSS_SELECTOR, "div.table[role='button'][data-value='PhoneAppOTP']", "PhoneAppOTP table role button"),
-                (By.CSS_SELECTOR, "#idDiv_SAOTCS_Proofs div.table[role='button'][data-value='PhoneAppOTP']", "PhoneAppOTP table inside proofs"),
-                (By.CSS_SELECTOR, "div[role='button'][data-value='PhoneAppOTP']", "PhoneAppOTP role button"),
-                (By.CSS_SELECTOR, "[data-value='PhoneAppOTP']", "PhoneAppOTP data-value"),
-                (By.CSS_SELECTOR, "div.row.tile [data-value='PhoneAppOTP']", "row tile data-value PhoneAppOTP"),
-                (By.CSS_SELECTOR, "div.row.tile", "row tile"),
-                (By.CSS_SELECTOR, "div.row.tile[role='listitem']", "row tile listitem"),
-                (By.CSS_SELECTOR, "#idDiv_SAOTCS_Proofs > div:nth-child(2) > div > div > div.table-cell.text-left.content > div", "provided CSS"),
-                (By.XPATH, "//*[@id='idDiv_SAOTCS_Proofs']/div[2]/div/div/div[2]/div", "provided XPath"),
-                (By.XPATH, "/html/body/div/form[1]/div/div/div[2]/div[1]/div/div/div/div/div/div[2]/div[2]/div/div[2]/div/div[2]/div[2]/div[2]/div/div/div[2]/div", "provided absolute XPath"),
-                # From user snippet: tile row and text cell
-                (By.CSS_SELECTOR, "#idDiv_SAOTCS_Proofs .table-row", "tile row"),
-                (By.CSS_SELECTOR, "#idDiv_SAOTCS_Proofs .table-row .table-cell.text-left.content", "tile content cell"),
-                (By.XPATH, "//*[@id='idDiv_SAOTCS_Proofs']//div[contains(@class,'table-row')]//div[contains(@class,'text-left')]/div[contains(normalize-space(.), 'Use a verification code')]/ancestor::div[contains(@class,'table-row')][1]", "table-row ancestor of text"),
-                (By.XPATH, "//img[contains(@src,'picker_verify_code')]/ancestor::div[contains(@class,'table-row')][1]", "verify-code image row"),
-                (By.CSS_SELECTOR, "img[src*='picker_verify_code']", "verify-code img"),
-                # broader container clicks
-                (By.CSS_SELECTOR, "#idDiv_SAOTCS_Proofs", "proofs container"),
-                (By.XPATH, "//*[@id='idDiv_SAOTCS_Proofs']//div[contains(normalize-space(.), 'Use a verification code')]/parent::*", "text parent"),
-                (By.XPATH, "//*[@id='idDiv_SAOTCS_Proofs']//div[contains(normalize-space(.), 'Use a verification code')]/parent::div/parent::div", "text grandparent"),
-                (By.XPATH, "//*[@id='idDiv_SAOTCS_Proofs']//div[contains(@class,'table-cell')][.//div[contains(normalize-space(.), 'Use a verification code')]]", "cell containing text"),
-            ]
-
-            otp_input = None
-            for round_idx in range(2):
-                chosen = False
-                if click_with_retries(driver, candidates, attempts=6, delay=0.8):
-                    chosen = True
-                elif click_by_xpath_contains_text(driver, "Use a verification code", timeout=5):
-                    chosen = True
-                elif click_by_xpath_contains_text(driver, "Use verification code", timeout=5):
-                    chosen = True
-                else:
-                    try:
-                        elem = WebDriverWait(driver, 6).until(
-                            EC.presence_of_element_located((By.XPATH, "//div[contains(normalize-space(.), 'Use a verification code')]/ancestor::*[self::button or self::a or @role='button' or @tabindex='0'][1]"))
-                        )
-                        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", elem)
-                        driver.execute_script("arguments[0].click();", elem)
-                        logger.info("Clicked ancestor container for 'Use a verification code'")
-                        chosen = True
-                    except Exception:
-                        pass
-
-                if not chosen:
-                    logger.error("Could not select 'Use a verification code'.")
-                    return False
-
-                logger.info("Waiting for OTP input after clicking verification code option...")
-                selectors = [
-                    (By.NAME, 'otc'),
-                    (By.ID, 'idTxtBx_SAOTCC_OTC'),
-                    (By.CSS_SELECTOR, 'input[data-testid="verification-entercode-input"]'),
-                    (By.CSS_SELECTOR, 'input[name="otc"]'),
-                ]
-                for by, sel in selectors:
-                    try:
-                        otp_input = WebDriverWait(driver, 12).until(EC.element_to_be_clickable((by, sel)))
-                        break
-                    except Exception:
-                        continue
-                if otp_input:
-                    break
-                else:
-                    logger.warning("OTP input still not visible; retrying click on verification code option...")
-
-            if not otp_input:
-                logger.error("OTP input not found after clicking verification code option.")
-                return False
-
-            otp_input.clear()
-            from local_2fa import get_otp
-            otp = get_otp()
-            otp_input.send_keys(otp)
-            logger.info(f"Filled OTP: {otp}")
-
-            # Verify button candidates
-            verify_selectors = [
-                (By.ID, 'idSubmit_SAOTCC_Continue'),
-                (By.CSS_SELECTOR, '[data-testid="reskin-step-next-button"]'),
-            ]
-            clicked = False
-            for by, sel in verify_selectors:
-                try:
-                    btn = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((by, sel)))
-                    driver.execute_script("arguments[0].click();", btn)
-                    clicked = True
-                    break
-                except Exception:
-                    continue
-            if not clicked:
-                if click_by_xpath_contains_text(driver, 'Verify', timeout=5):
-                    clicked = True
-            if not clicked:
-                logger.error("Verify button not found.")
-                return False
-            time.sleep(2)
-            return True
-        except Exception as e:
-            logger.error(f"MFA fallback failed: {e}", exc_info=True)
+        if waits.wait_until(driver, lambda d: d.find_elements(By.ID, "pbid-blockFoundHappeningNowAttending"), 30):
+            log_time_to_block(load_started, "after login")
+        return True
+
+    # Compare runs with --launch-profile legacy to see what the fast profile saves
+    def log_time_to_block(load_started, note=None):
+        suffix = f", {note}" if note else ""
+        logger.info(
+            f"Attendance block ready in {time.monotonic() - load_started:.1f}s ({launch_profile} launch profile{suffix})."
+        )
+
+    def log_chrome_memory(driver):
+        """Log this driver's Chrome RSS; called once the attendance work is done, as it can scan /proc."""
+        if chrome_supervisor.enabled:
+            logger.info(f"Chrome RSS {chrome_supervisor.rss_mb(driver):.0f} MB ({launch_profile} launch profile).")
+
+    def prewarm_event(event_time, event_name, trigger_time, profile_key):
+        """Launch Chrome, finish any login/MFA and park on the attendance page before the trigger."""
+        driver = driver_pool.acquire(profile_key)
+        if not driver:
+            logger.error("WebDriver initialization failed during pre-warm.")
             return False
-
-    broadcaster = None
-
-    def attempt_login(driver, expected_url):
-        """Try automatic MS login using stored credentials and OTP."""
+        driver_broken = False
         try:
-            result = renew_login(driver, expected_url)
-            if result:
-                verified = verify_login(driver, expected_url, max_wait_minutes=5)
-                if verified and broadcaster:
-                    broadcaster.notify_renew_login_success()
-                return verified
+            # Give up by the trigger so the real run is never kept waiting on the driver
+            if open_attendance_page(driver, trigger_time, profile_key):
+                logger.info(f"{profile_label(profile_key)}Pre-warmed session for {event_name}.")
+                return True
+            logger.warning(f"Pre-warm login failed for {event_name}; will retry at trigger time.")
             return False
         except Exception as e:
-            logger.error(f"Auto-login attempt failed: {e}", exc_info=True)
+            logger.warning(f"Pre-warm failed for {event_name}: {e}")
+            driver_broken = True
             return False
-
-    def automated_function(event_time, event_name, upcoming_events):
+        finally:
+            driver_pool.release(profile_key, discard=driver_broken)
+            chrome_supervisor.reap()
+
+    def compact_profile_job(profile_key):
+        """Prune caches and vacuum databases of one Chrome profile while it has no driver."""
+        user_data_dir = profiles_by_key[profile_key].user_data_dir
+        if driver_pool.run_closed(profile_key, lambda: compact_profile(user_data_dir, logger=logger)) is None:
+            logger.debug(f"{profile_label(profile_key)}Chrome profile not compacted; will retry later.")
+
+    def log_next_event(upcoming_events):
+        next_event = upcoming_events.peek()
+        if not next_event:
+            return False
+        next_event_start, next_event_name, _, next_event_end, profile_key = next_event
+        local_next_event_start = next_event_start.astimezone()
+        duration = next_event_end - next_event_start
+        logger.info(
+            f"{profile_label(profile_key)}Waiting for next event: [bold magenta]{next_event_name}[/bold magenta] at "
+            f"[bold cyan]{local_next_event_start.strftime('%Y-%m-%d %H:%M:%S')}[/bold cyan] "
+            f"(duration: [bold green]{str(duration).split('.')[0]}[/bold green])"
+        )
+        return True
+
+    def automated_function(event_time, event_name, event_end, profile_key, upcoming_events):
         global attendance_success_count
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        user_data_dir = os.path.join(script_dir, 'chrome_user_data')
-        os.makedirs(user_data_dir, exist_ok=True)
-
-        driver = initialize_webdriver(user_data_dir)
+        label = profile_label(profile_key)
+        broadcaster = broadcasters.get(profile_key)
+        driver = driver_pool.acquire(profile_key)
         if not driver:
             logger.error("WebDriver initialization failed. Exiting function.")
             return False
 
+        driver_broken = False
         try:
-            # Use your actual attendance URL
-            driver.get("https://generalssb-prod.ec.royalholloway.ac.uk/BannerExtensibility/customPage/page/RHUL_Attendance_Student")
-            logger.info("Opened attendance page.")
-
-            expected_url = "https://generalssb-prod.ec.royalholloway.ac.uk/BannerExtensibility/customPage/page/RHUL_Attendance_Student"
-            # 尝试自动登录（凭证 + OTP），若已登录则快速通过
-            if not attempt_login(driver, expected_url):
-                logger.error("Auto-login or verification failed.")
+            # Logging in after the event has ended is pointless; bound the whole login by the end time
+            if not open_attendance_page(driver, event_end, profile_key):
+                logger.error(f"{label}Auto-login or verification failed.")
                 return False
 
             WebDriverWait(driver, 30).until(EC.presence_of_element_located((By.ID, "pbid-blockFoundHappeningNowAttending")))
@@ -579,11 +580,7 @@ def main():
                 else:
                     logger.info("Attendance has already been marked. Removing event and logging next event.")
 
-                    with events_lock:
-                        for event in upcoming_events:
-                            if event[0] == event_time and event[1] == event_name:
-                                upcoming_events.remove(event)
-                                break
+                    upcoming_events.cancel(event_time, event_name, profile_key)
 
                 return True
         
@@ -594,77 +591,70 @@ def main():
                 logger.warning("No clickable button found. Ending function.")
                 return False
 
-            # Verify that attendance has been marked
-            time.sleep(2)  # Wait for any potential page updates
-            attending_div = driver.find_element(By.ID, "pbid-blockFoundHappeningNowAttending")
-            attending_aria_hidden = attending_div.get_attribute("aria-hidden")
-            if attending_aria_hidden == "false":
-                logger.info("Attendance successfully marked.")
+            # Verify that attendance has been marked: wait for the block to flip visible
+            marked = waits.wait_until(
+                driver,
+                lambda d: d.find_element(By.ID, "pbid-blockFoundHappeningNowAttending").get_attribute("aria-hidden") == "false",
+                waits.STEP_BUDGETS['attendance_confirm'],
+            )
+            if marked:
+                logger.info(f"{label}Attendance successfully marked.")
                 with counter_lock:
                     attendance_success_count += 1
 
                 if broadcaster:
                     broadcaster.notify_attendance_success(event_name, event_time)
 
-                with events_lock:
-                    for event in upcoming_events:
-                        if event[0] == event_time and event[1] == event_name:
-                            upcoming_events.remove(event)
-                            break
+                upcoming_events.cancel(event_time, event_name, profile_key)
                 return True
             else:
-                logger.error("Failed to confirm attendance after clicking.")
+                logger.error(f"{label}Failed to confirm attendance after clicking.")
                 return False
 
         except Exception as e:
             logger.error(f"Failed during attendance marking: {e}", exc_info=True)
+            driver_broken = True
             return False
         finally:
-            if driver:
-                try:
-                    driver.quit()
-                except Exception as e:
-                    logger.warning(f"Failed to quit WebDriver cleanly: {e}")
+            if not driver_broken:
+                log_chrome_memory(driver)
+            driver_pool.release(profile_key, discard=driver_broken)
+            chrome_supervisor.reap()
             # Log the next event
-            with events_lock:
-                if upcoming_events:
-                    next_event_start, next_event_name, _, next_event_end = upcoming_events[0]
-                    local_next_event_start = next_event_start.astimezone()
-                    duration = next_event_end - next_event_start
-                    logger.info(
-                        f"Waiting for next event: [bold magenta]{next_event_name}[/bold magenta] at "
-                        f"[bold cyan]{local_next_event_start.strftime('%Y-%m-%d %H:%M:%S')}[/bold cyan] "
-                        f"(duration: [bold green]{str(duration).split('.')[0]}[/bold green])"
-                    )
-                else:
-                    logger.info("No further upcoming events.")
-
-    def load_calendar(file_path):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                calendar = Calendar(f.read())
-            return calendar
-        except FileNotFoundError:
-            logger.error(f"Calendar file not found: {file_path}")
-            return None
-        except Exception as e:
-            logger.error(f"Error loading calendar: {e}", exc_info=True)
-            return None
+            if not log_next_event(upcoming_events):
+                logger.info("No further upcoming events.")
 
-    def get_upcoming_events(calendar):
+    def get_upcoming_events(timetables):
+        """Merge every profile's future events into one scheduler."""
         now = datetime.now(timezone.utc)
-        upcoming_events = []
-        for event in calendar.events:
-            # Convert event start and end times to UTC
-            event_start = event.begin.to('UTC').datetime
-            event_end = event.end.to('UTC').datetime
-            event_name = event.name
-            trigger_time = calculate_trigger_time(event_start)
-            if event_start > now and 'Optional Attendance' not in event_name:
-                upcoming_events.append((event_start, event_name, trigger_time, event_end))
-        upcoming_events.sort(key=lambda x: x[2])  # Sort by trigger_time
+        upcoming_events = EventScheduler()
+        for profile_key, (_, event_records) in timetables.items():
+            for start_epoch, end_epoch, event_name in event_records:
+                event_start = datetime.fromtimestamp(start_epoch, timezone.utc)
+                event_end = datetime.fromtimestamp(end_epoch, timezone.utc)
+                trigger_time = calculate_trigger_time(event_start)
+                if event_start > now and 'Optional Attendance' not in event_name:
+                    upcoming_events.add(event_start, event_name, trigger_time, event_end, profile_key)
         return upcoming_events
 
+    def apply_timetable_changes(upcoming_events, added, removed, changed, profile_key):
+        """Merge a timetable diff into the live schedule; in-flight jobs are untouched."""
+        for start_epoch, _, event_name in removed:
+            upcoming_events.cancel(datetime.fromtimestamp(start_epoch, timezone.utc), event_name, profile_key)
+        for start_epoch, end_epoch, event_name in changed:
+            event_start = datetime.fromtimestamp(start_epoch, timezone.utc)
+            event_end = datetime.fromtimestamp(end_epoch, timezone.utc)
+            existing = upcoming_events.get(event_start, event_name, profile_key)
+            if existing:
+                upcoming_events.reschedule(event_start, event_name, existing[2], event_end, profile_key)
+        for start_epoch, end_epoch, event_name in added:
+            if 'Optional Attendance' in event_name:
+                continue
+            event_start = datetime.fromtimestamp(start_epoch, timezone.utc)
+            event_end = datetime.fromtimestamp(end_epoch, timezone.utc)
+            upcoming_events.add(event_start, event_name, calculate_trigger_time(event_start), event_end, profile_key)
+        log_next_event(upcoming_events)
+
     def calculate_trigger_time(event_time):
         minutes_after = random.randint(3, 8)
         trigger_time = event_time + timedelta(minutes=minutes_after)
@@ -672,39 +662,66 @@ def main():
 
     def wait_and_trigger(upcoming_events, exit_event):
         # Log the next event at the beginning
-        with events_lock:
-            if upcoming_events:
-                next_event_start, next_event_name, _, next_event_end = upcoming_events[0]
-                local_next_event_start = next_event_start.astimezone()
-                duration = next_event_end - next_event_start
-                logger.info(
-                    f"Waiting for next event: [bold magenta]{next_event_name}[/bold magenta] at "
-                    f"[bold cyan]{local_next_event_start.strftime('%Y-%m-%d %H:%M:%S')}[/bold cyan] "
-                    f"(duration: [bold green]{str(duration).split('.')[0]}[/bold green])"
-                )
+        log_next_event(upcoming_events)
 
         logger.info("Waiting in the background for events to trigger...")
+        prewarmed = set()
+        compaction_attempts = {}
         while not exit_event.is_set():
             now = datetime.now(timezone.utc)
-            with events_lock:
-                if not upcoming_events:
+            sleep_duration = 0
+            event = upcoming_events.next(now=now)
+            if event:
+                event_time, event_name, trigger_time, event_end, profile_key = event
+                local_event_time = event_time.astimezone()
+                logger.info(
+                    f"{profile_label(profile_key)}[bold red]Triggering event:[/bold red] [bold magenta]{event_name}[/bold magenta] at "
+                    f"[bold cyan]{local_event_time.strftime('%Y-%m-%d %H:%M:%S')}[/bold cyan]"
+                )
+                attendance_executor.submit(
+                    profiles_by_key[profile_key].user_data_dir, ('attend', event_time, event_name),
+                    automated_function, event_time, event_name, event_end, profile_key, upcoming_events,
+                )
+                prewarmed.discard((event_time, event_name, profile_key))
+            else:
+                pending = upcoming_events.snapshot()
+                if not pending:
+                    # Let the last attendance run finish before tearing the browser down
+                    while not attendance_executor.wait_idle(timeout=1):
+                        if exit_event.is_set():
+                            break
                     logger.info("All events have been processed, exiting the script.")
                     exit_event.set()
                     break
-                event = upcoming_events[0]
-                event_time, event_name, trigger_time, event_end = event
-                if now >= trigger_time.astimezone(timezone.utc):
-                    local_event_time = event_time.astimezone()
-                    logger.info(
-                        f"[bold red]Triggering event:[/bold red] [bold magenta]{event_name}[/bold magenta] at "
-                        f"[bold cyan]{local_event_time.strftime('%Y-%m-%d %H:%M:%S')}[/bold cyan]"
-                    )
-                    # Run automated_function in a new thread
-                    threading.Thread(target=automated_function, args=(event_time, event_name, upcoming_events), daemon=True).start()
-                    # Event processed, remove it
-                    upcoming_events.pop(0)
-                else:
-                    sleep_duration = max((trigger_time - now).total_seconds(), 0)
+                # Several profiles can share a slot, so pre-warm every event whose lead time has come
+                sleep_duration = 60
+                for event_time, event_name, trigger_time, event_end, profile_key in pending:
+                    prewarm_time = trigger_time - timedelta(seconds=PREWARM_LEAD_SECONDS)
+                    if now < prewarm_time:
+                        sleep_duration = min(sleep_duration, (prewarm_time - now).total_seconds())
+                        break
+                    sleep_duration = min(sleep_duration, max((trigger_time - now).total_seconds(), 0))
+                    key = (event_time, event_name, profile_key)
+                    if key not in prewarmed:
+                        prewarmed.add(key)
+                        logger.info(f"{profile_label(profile_key)}Pre-warming browser for [bold magenta]{event_name}[/bold magenta]")
+                        attendance_executor.submit(
+                            profiles_by_key[profile_key].user_data_dir, ('prewarm', event_time, event_name),
+                            prewarm_event, event_time, event_name, trigger_time, profile_key,
+                        )
+                # Keep Chrome profiles from growing without bound, but never near a trigger or with Chrome open
+                if min(entry[2] for entry in pending) - now > timedelta(seconds=COMPACTION_QUIET_SECONDS):
+                    for profile in profiles:
+                        last_attempt = compaction_attempts.get(profile.key)
+                        if last_attempt is not None and time.monotonic() - last_attempt < COMPACTION_RETRY_SECONDS:
+                            continue
+                        if not driver_pool.is_open(profile.key) and compaction_due(profile.user_data_dir):
+                            compaction_attempts[profile.key] = time.monotonic()
+                            attendance_executor.submit(
+                                profile.user_data_dir, ('compact',), compact_profile_job, profile.key,
+                            )
+            driver_pool.reap_idle()
+            chrome_supervisor.reap()
             if exit_event.wait(timeout=min(sleep_duration, 60)):
                 break
 
@@ -717,16 +734,19 @@ def main():
                     ctrl_pressed[0] = True
                 elif key.char == ']':
                     if ctrl_pressed[0]:
-                        with events_lock:
-                            if upcoming_events:
-                                next_event_time, next_event_name, _, next_event_end = upcoming_events[0]
-                                logger.info(
-                                    f"[bold magenta]Manually triggered automation for:[/bold magenta] [bold magenta]{next_event_name}[/bold magenta]"
-                                )
-                                # Run automated_function in a new thread
-                                threading.Thread(target=automated_function, args=(next_event_time, next_event_name, upcoming_events), daemon=True).start()
-                            else:
-                                logger.warning("No upcoming events to process.")
+                        next_event = upcoming_events.peek()
+                        if next_event:
+                            next_event_time, next_event_name, _, next_event_end, next_profile_key = next_event
+                            logger.info(
+                                f"{profile_label(next_profile_key)}[bold magenta]Manually triggered automation for:[/bold magenta] [bold magenta]{next_event_name}[/bold magenta]"
+                            )
+                            # Same key as the scheduled run, so repeated presses cannot stack up Chromes
+                            attendance_executor.submit(
+                                profiles_by_key[next_profile_key].user_data_dir, ('attend', next_event_time, next_event_name),
+                                automated_function, next_event_time, next_event_name, next_event_end, next_profile_key, upcoming_events,
+                            )
+                        else:
+                            logger.warning("No upcoming events to process.")
                 elif key.char == 'q':
                     if ctrl_pressed[0]:
                         logger.info("Exit shortcut pressed. Terminating the script.")
@@ -741,28 +761,13 @@ def main():
             except AttributeError:
                 pass
 
+        from pynput import keyboard
         listener = keyboard.Listener(on_press=on_press, on_release=on_release)
         listener.start()
         while not exit_event.is_set():
             time.sleep(1)
         listener.stop()
 
-    def get_single_ics_file():
-        ics_folder = os.path.join(script_dir, 'ics')
-        if not os.path.exists(ics_folder):
-            os.makedirs(ics_folder, exist_ok=True)
-            logger.info(f"Created folder '{ics_folder}' as it did not exist.")
-
-        ics_files = [os.path.join(ics_folder, file) for file in os.listdir(ics_folder) if file.endswith('.ics')]
-        if len(ics_files) == 0:
-            logger.error("Error: No .ics file found.")
-            return None
-        elif len(ics_files) > 1:
-            logger.error("Error: Multiple .ics files found, please ensure only one file is in the ics folder.")
-            return None
-        else:
-            return ics_files[0]
-
     def get_runtime_duration():
         delta = datetime.now() - start_time
         return str(delta).split('.')[0]
@@ -802,9 +807,15 @@ def main():
         except Exception:
             return "Not set"
 
-    ensure_profile_nickname()
-    profile_nickname = load_profile_nickname()
-    broadcaster = DiscordBroadcaster(credentials_path=credentials_path, logger=logger, profile_name=profile_nickname)
+    if profiles_dir:
+        profile_nickname = ", ".join(profile.nickname for profile in profiles)
+    else:
+        ensure_profile_nickname()
+        profile_nickname = load_profile_nickname()
+    for profile in profiles:
+        broadcasters[profile.key] = DiscordBroadcaster(
+            credentials_path=profile.credentials_path, logger=logger, profile_name=profile.nickname
+        )
 
     def get_git_info():
         """Return (hash, date, count) for current HEAD; fallback to unknown."""
@@ -821,15 +832,23 @@ def main():
         nickname = profile_nickname
         broadcast_enabled = False
         try:
-            broadcast_enabled = bool(getattr(broadcaster, 'enabled', False))
+            broadcast_enabled = any(getattr(b, 'enabled', False) for b in broadcasters.values())
         except Exception:
             broadcast_enabled = False
+        from rich.console import Console
+        from rich.panel import Panel
+        from rich.live import Live
+        from rich.table import Table
+        from rich.align import Align
+        from rich.text import Text
+        console = Console()
         with Live(refresh_per_second=1, console=console, screen=True) as live:
             while not exit_event.is_set():
                 with counter_lock:
                     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                     runtime = get_runtime_duration()
                     attendance = attendance_success_count
+                queued_jobs, running_jobs = attendance_executor.depth()
 
                 with log_buffer_lock:
                     latest_logs = list(log_buffer)
@@ -839,6 +858,7 @@ def main():
                     f"[bold cyan]Current Time:[/bold cyan] {current_time}",
                     f"[bold green]Runtime Duration:[/bold green] {runtime}",
                     f"[bold yellow]Attendance Success Count:[/bold yellow] {attendance}",
+                    f"[bold blue]Jobs:[/bold blue] {running_jobs} running, {queued_jobs} queued",
                     f"[bold magenta]PandaQuQ:[/bold magenta] [link=https://github.com/PandaQuQ/RHUL_attendance_bot]GitHub Repo[/link]"
                 )
 
@@ -871,76 +891,71 @@ def main():
                 if exit_event.wait(timeout=1):
                     break
 
-    def check_system_time():
-        try:
-            client = ntplib.NTPClient()
-            response = client.request('pool.ntp.org')
-            system_time = datetime.now(timezone.utc).timestamp()
-            ntp_time = response.tx_time
-            time_difference = abs(system_time - ntp_time)
-            if time_difference > 5:
-                logger.warning(f"System time is off by {time_difference} seconds. Consider synchronizing your clock.")
-            else:
-                logger.info("System time is synchronized with NTP server.")
-        except Exception as e:
-            logger.error(f"Failed to check system time: {e}", exc_info=True)
-
-    def check_for_updates():
-        try:
-            local_commit = subprocess.check_output(['git', 'rev-parse', 'HEAD']).decode().strip()
-            remote_commit = subprocess.check_output(['git', 'ls-remote', 'origin', 'HEAD']).decode().split()[0]
-            if local_commit != remote_commit:
-                logger.info("New update detected.")
-                # Prompt the user in the console
-                print("A new update is available. Do you want to update now? (y/n): ", end='')
-                user_input = input().strip().lower()
-                if user_input == '' or user_input == 'y':
-                    logger.info("Updating the script...")
-                    subprocess.check_call(['git', 'pull'])
-                    logger.info("Update successful. Restarting the script...")
-                    os.execv(sys.executable, [sys.executable] + sys.argv)
-                else:
-                    logger.info("Skipping update. Continuing with the current version.")
-            else:
-                logger.info("No updates found. Continuing execution.")
-        except Exception as e:
-            logger.error(f"Failed to check for updates: {e}", exc_info=True)
-
+    ui_threads = []
     try:
-        check_for_updates()
-        check_system_time()
-
-        ics_file = get_single_ics_file()
-        if not ics_file:
-            logger.info("Program terminated due to missing or multiple .ics files.")
-            return
-
-        calendar = load_calendar(ics_file)
-        if not calendar:
-            logger.error("Failed to load calendar. Exiting.")
-            return
-
-        upcoming_events = get_upcoming_events(calendar)
+        # Non-gating checks log themselves when they finish
+        for result in preflight_results:
+            if not result.gating:
+                continue
+            status = 'ok' if result.ok else result.error
+            elapsed = f"{result.elapsed:.2f}s" if result.elapsed is not None else '-'
+            logger.info(f"Preflight {result.name}: {status} ({elapsed})")
+
+        upcoming_events = get_upcoming_events(timetables)
         if not upcoming_events:
             logger.info("No upcoming events.")
             return
 
         git_commit, git_date, git_count = get_git_info()
 
-        if broadcaster:
-            version_label = f"No.{git_count} version"
+        version_label = f"No.{git_count} version"
+        for broadcaster in broadcasters.values():
             broadcaster.notify_bot_started(version_label=version_label)
 
         # Start threads with exit_event
-        display_thread = threading.Thread(target=update_display, args=(exit_event,), daemon=True)
-        keypress_thread = threading.Thread(target=listen_for_keypress, args=(upcoming_events, exit_event), daemon=True)
-        display_thread.start()
-        keypress_thread.start()
+        if not headless:
+            logger.removeHandler(startup_handler)
+            ui_threads.append(threading.Thread(target=update_display, args=(exit_event,), daemon=True))
+            ui_threads.append(threading.Thread(target=listen_for_keypress, args=(upcoming_events, exit_event), daemon=True))
+        for ui_thread in ui_threads:
+            ui_thread.start()
+
+        # Pick up timetable edits without restarting
+        for profile_key, (ics_file, event_records) in timetables.items():
+            timetable_watcher = TimetableWatcher(
+                os.path.dirname(ics_file),
+                event_records,
+                load_event_records,
+                lambda added, removed, changed, key=profile_key: apply_timetable_changes(upcoming_events, added, removed, changed, key),
+                logger=logger,
+            )
+            threading.Thread(target=timetable_watcher.run, args=(exit_event,), daemon=True).start()
+
+        # Keep the login fresh between lectures so event-time runs skip the MS login
+        def next_trigger_epoch(profile_key):
+            if len(profiles) == 1:
+                event = upcoming_events.peek()
+                return event[2].timestamp() if event else None
+            triggers = [event[2] for event in upcoming_events.snapshot() if event[4] == profile_key]
+            return triggers[0].timestamp() if triggers else None
+
+        def touch_session(driver, profile_key):
+            deadline = datetime.now(timezone.utc) + timedelta(minutes=KEEPALIVE_LOGIN_MINUTES)
+            return open_attendance_page(driver, deadline, profile_key)
+
+        for profile in profiles:
+            session_keepalive = SessionKeepalive(
+                driver_pool.session(profile.key),
+                lambda driver, key=profile.key: touch_session(driver, key),
+                lambda key=profile.key: next_trigger_epoch(key),
+                logger=logger,
+            )
+            threading.Thread(target=session_keepalive.run, args=(exit_event,), daemon=True).start()
 
         wait_and_trigger(upcoming_events, exit_event)
         exit_event.set()
-        display_thread.join(timeout=3)
-        keypress_thread.join(timeout=3)
+        for ui_thread in ui_threads:
+            ui_thread.join(timeout=3)
 
     except KeyboardInterrupt:
         logger.info("Script terminated by user.")
@@ -949,16 +964,17 @@ def main():
         logger.error(f"Unhandled exception: {e}", exc_info=True)
         exit_event.set()
     finally:
-        if broadcaster:
+        attendance_executor.shutdown(timeout=5)
+        driver_pool.shutdown()
+        chrome_supervisor.reap()
+        for broadcaster in broadcasters.values():
             try:
                 broadcaster.notify_bot_stopped(runtime=get_runtime_duration())
             except Exception:
                 pass
-        try:
-            display_thread.join(timeout=3)
-            keypress_thread.join(timeout=3)
-        except Exception:
-            pass
+        close_broadcasters(broadcasters.values())
+        for ui_thread in ui_threads:
+            ui_thread.join(timeout=3)
 
 if __name__ == "__main__":
     main()
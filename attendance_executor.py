@@ -0,0 +1,101 @@
+import logging
+import threading
+import time
+from collections import deque
+
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_MAX_PENDING = 32
+
+
+class AttendanceExecutor:
+    """Bounded worker pool for browser jobs, serialised per Chrome profile directory.
+
+    Chrome locks its user-data dir, so two jobs on the same profile can never run
+    at once; jobs for different profiles share ``max_workers`` threads. A job whose
+    (profile, key) is already queued or running is dropped rather than duplicated.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, max_pending=DEFAULT_MAX_PENDING, logger=None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.logger = logger or logging.getLogger("attendance_bot")
+        self._cond = threading.Condition()
+        self._queues = {}
+        self._ready = deque()
+        self._running = set()
+        self._keys = set()
+        self._pending = 0
+        self._workers = []
+        self._stopping = False
+
+    def submit(self, profile, key, func, *args):
+        """Queue ``func(*args)`` for ``profile``; returns False if it is a duplicate or the queue is full."""
+        with self._cond:
+            if self._stopping:
+                return False
+            if (profile, key) in self._keys:
+                self.logger.info(f"Job {key} is already queued or running; not adding it again.")
+                return False
+            if self._pending >= self.max_pending:
+                self.logger.warning(f"Job queue full ({self._pending} pending); dropping {key}.")
+                return False
+            self._keys.add((profile, key))
+            self._queues.setdefault(profile, deque()).append((key, func, args))
+            self._pending += 1
+            if profile not in self._running and profile not in self._ready:
+                self._ready.append(profile)
+            if len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._work, name=f"attendance-worker-{len(self._workers)}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            self._cond.notify()
+            self.logger.info(f"Queued {key} (queued={self._pending - len(self._running)}, running={len(self._running)}).")
+            return True
+
+    def depth(self):
+        """Return (queued, running) job counts."""
+        with self._cond:
+            return self._pending - len(self._running), len(self._running)
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._ready and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                profile = self._ready.popleft()
+                key, func, args = self._queues[profile].popleft()
+                self._running.add(profile)
+            try:
+                func(*args)
+            except Exception as e:
+                self.logger.error(f"Job {key} failed: {e}", exc_info=True)
+            finally:
+                with self._cond:
+                    self._running.discard(profile)
+                    self._keys.discard((profile, key))
+                    self._pending -= 1
+                    if self._queues[profile]:
+                        self._ready.append(profile)
+                    else:
+                        del self._queues[profile]
+                    self._cond.notify_all()
+
+    def wait_idle(self, timeout=None):
+        """Block until every queued and running job has finished; returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def shutdown(self, timeout=None):
+        """Drop queued jobs and stop the workers once their current job finishes.
+
+        ``timeout`` bounds the wait for all workers together, not each one.
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            workers = list(self._workers)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for worker in workers:
+            worker.join(timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
@@ -3,14 +3,17 @@
 import os
 import json
 import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from driver_resolver import start_chrome
 from local_2fa import bind, get_otp
+from login_flow import LoginStateMachine
+from page_state import KMSI, MFA_PICKER, MS_PASSWORD, MS_USERNAME, OTP_ENTRY, classify_page, is_ms_login_url
+from selector_probe import click_element, probe
+from selector_stats import get_selector_stats
+from waits import STEP_BUDGETS, capped, click_when_ready, wait_after_submit, wait_for_selected, wait_until
 
 CONFIG_FILE = '2fa_config.json'
 CREDENTIALS_FILE = 'credentials.json'
@@ -18,6 +21,87 @@ SECURITY_INFO_URL = 'https://mysignins.microsoft.com/security-info'
 LOGIN_URL = 'https://mysignins.microsoft.com/security-info'
 
 
+def _text_xpath(text):
+    return f"//*[self::button or self::a or self::div or self::span][contains(normalize-space(.), '{text}') ]"
+
+
+# Selector candidates for the login fallbacks, in priority order. Each list is
+# probed in a single script call, so the trailing text matches cost nothing
+# when an earlier selector hits.
+ALTERNATIVE_METHOD_CANDIDATES = [
+    (By.ID, 'signInAnotherWay', "signInAnotherWay link"),
+    (By.XPATH, _text_xpath("I can't use my Microsoft Authenticator app right now"), "can't use Authenticator text"),
+]
+
+VERIFICATION_CODE_CANDIDATES = [
+    (By.CSS_SELECTOR, "div.table[role='button'][data-value='PhoneAppOTP']", "PhoneAppOTP table role button"),
+    (By.CSS_SELECTOR, "#idDiv_SAOTCS_Proofs div.table[role='button'][data-value='PhoneAppOTP']", "PhoneAppOTP table inside proofs"),
+    (By.CSS_SELECTOR, "div[role='button'][data-value='PhoneAppOTP']", "PhoneAppOTP role button"),
+    (By.CSS_SELECTOR, "[data-value='PhoneAppOTP']", "PhoneAppOTP data-value"),
+    (By.CSS_SELECTOR, "div.row.tile [data-value='PhoneAppOTP']", "row tile data-value PhoneAppOTP"),
+    (By.CSS_SELECTOR, "div.row.tile", "row tile"),
+    (By.CSS_SELECTOR, "div.row.tile[role='listitem']", "row tile listitem"),
+    (By.CSS_SELECTOR, "#idDiv_SAOTCS_Proofs > div:nth-child(2) > div > div > div.table-cell.text-left.content > div", "provided CSS"),
+    (By.XPATH, "//*[@id='idDiv_SAOTCS_Proofs']/div[2]/div/div/div[2]/div", "provided XPath"),
+    (By.XPATH, "/html/body/div/form[1]/div/div/div[2]/div[1]/div/div/div/div/div/div[2]/div[2]/div/div[2]/div/div[2]/div[2]/div[2]/div/div/div[2]/div", "provided absolute XPath"),
+    (By.CSS_SELECTOR, "#idDiv_SAOTCS_Proofs .table-row", "tile row"),
+    (By.CSS_SELECTOR, "#idDiv_SAOTCS_Proofs .table-row .table-cell.text-left.content", "tile content cell"),
+    (By.XPATH, "//*[@id='idDiv_SAOTCS_Proofs']//div[contains(@class,'table-row')]//div[contains(@class,'text-left')]/div[contains(normalize-space(.), 'Use a verification code')]/ancestor::div[contains(@class,'table-row')][1]", "table-row ancestor of text"),
+    (By.XPATH, "//img[contains(@src,'picker_verify_code')]/ancestor::div[contains(@class,'table-row')][1]", "verify-code image row"),
+    (By.CSS_SELECTOR, "img[src*='picker_verify_code']", "verify-code img"),
+    (By.CSS_SELECTOR, "#idDiv_SAOTCS_Proofs", "proofs container"),
+    (By.XPATH, "//*[@id='idDiv_SAOTCS_Proofs']//div[contains(normalize-space(.), 'Use a verification code')]/parent::*", "text parent"),
+    (By.XPATH, "//*[@id='idDiv_SAOTCS_Proofs']//div[contains(normalize-space(.), 'Use a verification code')]/parent::div/parent::div", "text grandparent"),
+    (By.XPATH, "//*[@id='idDiv_SAOTCS_Proofs']//div[contains(@class,'table-cell')][.//div[contains(normalize-space(.), 'Use a verification code')]]", "cell containing text"),
+    (By.XPATH, _text_xpath("Use a verification code"), "text: Use a verification code"),
+    (By.XPATH, _text_xpath("Use verification code"), "text: Use verification code"),
+    (By.XPATH, "//div[contains(normalize-space(.), 'Use a verification code')]/ancestor::*[self::button or self::a or @role='button' or @tabindex='0'][1]", "ancestor container of text"),
+]
+
+USERNAME_INPUT_CANDIDATES = [
+    (By.NAME, 'loginfmt', "username: loginfmt"),
+    (By.ID, 'i0116', "username: i0116"),
+]
+
+PASSWORD_INPUT_CANDIDATES = [
+    (By.ID, 'i0118', "password: i0118"),
+    (By.NAME, 'passwd', "password: passwd"),
+]
+# How long to look for a password field before assuming the page wants the username
+PASSWORD_FIRST_TIMEOUT = 2
+
+OTP_INPUT_CANDIDATES = [
+    (By.NAME, 'otc', "otc"),
+    (By.ID, 'idTxtBx_SAOTCC_OTC', "idTxtBx_SAOTCC_OTC"),
+    (By.CSS_SELECTOR, 'input[data-testid="verification-entercode-input"]', "verification-entercode-input"),
+]
+
+OTP_VERIFY_CANDIDATES = [
+    (By.ID, 'idSubmit_SAOTCC_Continue', "idSubmit_SAOTCC_Continue"),
+    (By.CSS_SELECTOR, '[data-testid="reskin-step-next-button"]', "reskin-step-next-button"),
+    (By.XPATH, _text_xpath('Verify'), "text: Verify"),
+]
+
+KMSI_CONFIRM_CANDIDATES = [
+    (By.ID, 'idSIButton9', 'idSIButton9'),
+    (By.CSS_SELECTOR, "input[type='submit'].button_primary", "button_primary submit"),
+    (By.XPATH, "//input[@type='submit' and (contains(@value,'Yes') or contains(@value,'是') or contains(@value,'继续') or contains(@value,'Next') or contains(@value,'Sign in'))]", "submit value match"),
+    (By.XPATH, "//button[contains(normalize-space(.), 'Yes') or contains(normalize-space(.), '是') or contains(normalize-space(.), '继续') or contains(normalize-space(.), 'Next') or contains(normalize-space(.), 'Sign in') or contains(normalize-space(.), 'Accept') or contains(normalize-space(.), '登录') or contains(normalize-space(.), '同意')]", "button text match"),
+    (By.XPATH, _text_xpath('Yes'), "text: Yes"),
+    (By.XPATH, _text_xpath('Next'), "text: Next"),
+]
+
+
+def account_picker_candidates(username):
+    """Account tiles to try on the picker; labels stay stable across usernames so stats carry over."""
+    return [
+        (By.XPATH, _text_xpath(username), "account: full username"),
+        (By.XPATH, _text_xpath(username.split('@')[0]), "account: local part"),
+        (By.XPATH, _text_xpath('Use another account'), "text: Use another account"),
+        (By.XPATH, _text_xpath('Other account'), "text: Other account"),
+    ]
+
+
 def save_config(username, password, secret, profile_nickname=None, discord_webhook_url=None, enable_discord_webhook=None):
     with open(CONFIG_FILE, 'w') as f:
         json.dump({'secret': secret}, f)
@@ -39,21 +123,21 @@ def save_config(username, password, secret, profile_nickname=None, discord_webho
         json.dump(payload, f)
 
 
-def load_config():
-    if not os.path.exists(CONFIG_FILE):
+def load_config(path=CONFIG_FILE):
+    if not os.path.exists(path):
         return None
-    with open(CONFIG_FILE, 'r') as f:
+    with open(path, 'r') as f:
         return json.load(f)
 
-def load_credentials():
-    if not os.path.exists(CREDENTIALS_FILE):
+def load_credentials(path=CREDENTIALS_FILE):
+    if not os.path.exists(path):
         return None
-    with open(CREDENTIALS_FILE, 'r') as f:
+    with open(path, 'r') as f:
         return json.load(f)
 
 
 def click_by_xpath_contains_text(driver, text, timeout=10):
-    xpath = f"//*[self::button or self::a or self::div or self::span][contains(normalize-space(.), '{text}') ]"
+    xpath = _text_xpath(text)
     try:
         elem = WebDriverWait(driver, timeout).until(
             EC.element_to_be_clickable((By.XPATH, xpath))
@@ -83,32 +167,43 @@ def maybe_switch_to_login_iframe(driver):
     return False
 
 
-def click_with_retries(driver, candidates, attempts=6, delay=1.0):
-    """Try multiple selectors, with normal then JS click, retrying for dynamic UI."""
-    for attempt in range(1, attempts + 1):
-        for by, sel, label in candidates:
-            try:
-                elems = driver.find_elements(by, sel)
-                print(f"[click attempt {attempt}] selector={sel} label={label} found={len(elems)}")
-                for elem in elems:
-                    if not elem.is_displayed() or not elem.is_enabled():
-                        continue
-                    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", elem)
-                    try:
-                        elem.click()
-                    except Exception:
-                        driver.execute_script("arguments[0].click();", elem)
-                    print(f"[click attempt {attempt}] clicked {label} via {sel}")
-                    return True
-            except Exception as e:
-                print(f"[click attempt {attempt}] selector={sel} error={e}")
-                continue
-        time.sleep(delay)
-    print("click_with_retries exhausted without a click")
-    return False
+def click_with_retries(driver, candidates, attempts=6, delay=1.0, step=None, deadline=None):
+    """Click the first visible candidate, letting an in-page observer wait up to attempts*delay seconds.
+
+    With ``step`` the candidates are tried in the order learned from earlier runs.
+    The wait never runs past ``deadline`` (epoch seconds).
+    Returns the clicked (by, selector, label) candidate, or None.
+    """
+    timeout = capped(attempts * delay, deadline)
+    try:
+        if step:
+            element, candidate = get_selector_stats().probe(driver, step, candidates, timeout=timeout)
+        else:
+            element, index = probe(driver, candidates, timeout=timeout)
+            candidate = None if index is None else candidates[index]
+        if element is None:
+            print("click_with_retries exhausted without a click")
+            return None
+        click_element(driver, element)
+    except Exception as e:
+        print(f"click probe error={e}")
+        return None
+    print(f"clicked {candidate[2]} via {candidate[1]}")
+    return candidate
 
 
-def first_time_setup():
+def _fill_input(driver, element, value):
+    element.clear()
+    driver.execute_script("arguments[0].focus();", element)
+    try:
+        element.send_keys(value)
+    except Exception:
+        driver.execute_script("arguments[0].value = arguments[1];", element, value)
+
+
+def first_time_setup(driver=None):
+    """Save credentials and bind the authenticator; reuses ``driver`` if given and leaves it open."""
+    owns_driver = driver is None
     creds = load_credentials()
     profile_nickname = None
     discord_webhook_url = None
@@ -144,76 +239,39 @@ def first_time_setup():
     with open(CREDENTIALS_FILE, 'w') as f:
         json.dump(payload, f)
     print('Credentials saved. Starting automated login and 2FA binding...')
-    driver = start_driver()
+    if owns_driver:
+        driver = start_driver()
     # Automated login
     driver.get(LOGIN_URL)
     try:
         WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.NAME, 'loginfmt')))
         driver.find_element(By.NAME, 'loginfmt').send_keys(username)
         driver.find_element(By.ID, 'idSIButton9').click()
-        time.sleep(2)
-        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.NAME, 'passwd')))
-        driver.find_element(By.NAME, 'passwd').send_keys(password)
+        WebDriverWait(driver, STEP_BUDGETS['username_submit']).until(EC.visibility_of_element_located((By.NAME, 'passwd')))
+        pwd_input = driver.find_element(By.NAME, 'passwd')
+        pwd_input.send_keys(password)
         driver.find_element(By.ID, 'idSIButton9').click()
-        time.sleep(2)
-        # Continuously check and tick '不再显示此消息' checkbox, then click '是' button until navigation
-        for _ in range(30):  # up to 30 seconds
-            try:
-                # Tick the checkbox if present and not already selected
-                try:
-                    kmsi_checkbox = driver.find_element(By.ID, "KmsiCheckboxField")
-                    if kmsi_checkbox.is_displayed() and kmsi_checkbox.is_enabled() and not kmsi_checkbox.is_selected():
-                        print("Ticking '不再显示此消息' checkbox...")
-                        kmsi_checkbox.click()
-                        time.sleep(0.5)
-                except Exception:
-                    pass
-                # Find the confirmation button robustly (submit, class contains 'button_primary', value is '是')
-                btn_candidates = driver.find_elements(By.CSS_SELECTOR, "input[type='submit'].button_primary")
-                btn_clicked = False
-                for btn in btn_candidates:
-                    btn_class = btn.get_attribute('class') or ''
-                    btn_value = btn.get_attribute('value') or ''
-                    print(f"Found button: class={btn_class}, value={btn_value}")
-                    match_values = ['是', '下一步', 'Yes', '同意', '确认', '继续', '登录', 'Sign in', 'Accept', 'Next', 'Continue']
-                    if btn.is_displayed() and btn.is_enabled() and any(x in btn_value for x in match_values):
-                        print(f"Attempting to click button with value '{btn_value}' ...")
-                        try:
-                            btn.click()
-                            print(f"Clicked button '{btn_value}' with normal click.")
-                        except Exception:
-                            print("Normal click failed, trying JS click...")
-                            driver.execute_script("arguments[0].click();", btn)
-                            print(f"Clicked button '{btn_value}' with JS click.")
-                        time.sleep(1)
-                        btn_clicked = True
-                        break
-                if not btn_clicked:
-                    print("No clickable main button found, waiting...")
-                    time.sleep(1)
-            except Exception as e:
-                print(f"Exception in confirmation loop: {e}")
-                break  # Button not present, stop loop
+        wait_after_submit(driver, pwd_input, 'password_submit')
+        # Tick '不再显示此消息' and click '是' each time the prompt appears, until it stops appearing
+        confirm_prompts(driver)
         # Wait for navigation to security info page
         print('Waiting for navigation to security info page...')
-        max_wait = 60
-        waited = 0
-        while waited < max_wait:
-            current_url = driver.current_url
+
+        def reached_security_info(d):
             # On first login, handle the "Don't show this again" prompt (KMSI) while user completes MFA on phone
             try:
-                if driver.find_elements(By.ID, "KmsiCheckboxField"):
-                    handle_kmsi(driver)
+                if d.find_elements(By.ID, "KmsiCheckboxField"):
+                    handle_kmsi(d)
             except Exception:
                 pass
-            if current_url.startswith(SECURITY_INFO_URL):
-                print('Successfully navigated to security info page. Automating authenticator binding...')
-                break
-            time.sleep(2)
-            waited += 2
+            return d.current_url.startswith(SECURITY_INFO_URL)
+
+        if wait_until(driver, reached_security_info, STEP_BUDGETS['security_info_navigation'], poll_frequency=0.5):
+            print('Successfully navigated to security info page. Automating authenticator binding...')
         else:
             print('Did not reach security info page after login. Please check credentials or login flow.')
-            driver.quit()
+            if owns_driver:
+                driver.quit()
             return
         try:
             # Step 1: Click <span> with data-automationid="splitbuttonprimary" and child <i> with data-icon-name="Add"
@@ -222,31 +280,14 @@ def first_time_setup():
             )
             btn1 = icon_add.find_element(By.XPATH, './..')
             btn1.click()
-            time.sleep(1)
             # Step 2: Click button with data-testid="authmethod-picker-authenticatorApp"
-            btn2 = WebDriverWait(driver, 20).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, '[data-testid="authmethod-picker-authenticatorApp"]'))
-            )
-            btn2.click()
-            time.sleep(1)
+            click_when_ready(driver, (By.CSS_SELECTOR, '[data-testid="authmethod-picker-authenticatorApp"]'), 'security_info_step')
             # Step 3: Click button with class d_hxfHpJiF_9Hwnz7WNw
-            btn3 = WebDriverWait(driver, 20).until(
-                EC.element_to_be_clickable((By.CLASS_NAME, 'd_hxfHpJiF_9Hwnz7WNw'))
-            )
-            btn3.click()
-            time.sleep(1)
+            click_when_ready(driver, (By.CLASS_NAME, 'd_hxfHpJiF_9Hwnz7WNw'), 'security_info_step')
             # Step 4: Click button with data-testid="reskin-step-next-button"
-            btn4 = WebDriverWait(driver, 20).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, '[data-testid="reskin-step-next-button"]'))
-            )
-            btn4.click()
-            time.sleep(1)
+            click_when_ready(driver, (By.CSS_SELECTOR, '[data-testid="reskin-step-next-button"]'), 'security_info_step')
             # Step 5: Click button with data-testid="activation-qr-show/hide-info-button"
-            btn5 = WebDriverWait(driver, 20).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, '[data-testid="activation-qr-show/hide-info-button"]'))
-            )
-            btn5.click()
-            time.sleep(1)
+            click_when_ready(driver, (By.CSS_SELECTOR, '[data-testid="activation-qr-show/hide-info-button"]'), 'security_info_step')
             # Step 6: Extract secret from <tr> with data-testid="activation-url/key"
             secret_elem = WebDriverWait(driver, 20).until(
                 EC.presence_of_element_located((By.CSS_SELECTOR, 'tr[data-testid="activation-url/key"]'))
@@ -264,11 +305,7 @@ def first_time_setup():
                 )
                 print(f'Authenticator bound and secret saved: {secret}')
                 # Click '下一步' button after copying secret
-                btn_next = WebDriverWait(driver, 20).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, '[data-testid="reskin-step-next-button"]'))
-                )
-                btn_next.click()
-                time.sleep(1)
+                click_when_ready(driver, (By.CSS_SELECTOR, '[data-testid="reskin-step-next-button"]'), 'security_info_step')
                 # Step 7: Fill OTP in the input field (robust)
                 otp_input = WebDriverWait(driver, 20).until(
                     EC.element_to_be_clickable((By.CSS_SELECTOR, 'input[data-testid="verification-entercode-input"]'))
@@ -282,16 +319,20 @@ def first_time_setup():
                     EC.element_to_be_clickable((By.CSS_SELECTOR, '[data-testid="reskin-step-next-button"]'))
                 )
                 btn_otp_next.click()
-                time.sleep(1)
+                wait_after_submit(driver, otp_input, 'otp_submit')
             else:
                 print('Could not extract secret automatically. Please bind manually and update config.')
         except Exception as e:
             print(f'Error during security info automation: {e}')
-        print('Automation complete. Waiting 10 seconds before exit...')
-        time.sleep(10)
+        if owns_driver:
+            print('Automation complete. Waiting 10 seconds before exit...')
+            time.sleep(10)
+        else:
+            print('Automation complete.')
     except Exception as e:
         print(f'Error during automated login/setup: {e}')
-    driver.quit()
+    if owns_driver:
+        driver.quit()
 
 
 def start_driver():
@@ -299,9 +340,7 @@ def start_driver():
     options.add_argument('--no-sandbox')
     options.add_argument('--disable-dev-shm-usage')
     options.add_experimental_option('excludeSwitches', ['enable-logging'])
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
-    return driver
+    return start_chrome(options)
 
 
 def auto_login():
@@ -325,13 +364,13 @@ def auto_login():
         WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.NAME, 'loginfmt')))
         driver.find_element(By.NAME, 'loginfmt').send_keys(username)
         driver.find_element(By.ID, 'idSIButton9').click()
-        time.sleep(2)
-        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.NAME, 'passwd')))
-        driver.find_element(By.NAME, 'passwd').send_keys(password)
+        WebDriverWait(driver, STEP_BUDGETS['username_submit']).until(EC.visibility_of_element_located((By.NAME, 'passwd')))
+        pwd_input = driver.find_element(By.NAME, 'passwd')
+        pwd_input.send_keys(password)
         driver.find_element(By.ID, 'idSIButton9').click()
-        time.sleep(2)
+        wait_after_submit(driver, pwd_input, 'password_submit')
         # If OTP requested, fill it
-        if 'Enter code' in driver.page_source or 'Verification code' in driver.page_source:
+        if classify_page(driver) in (MFA_PICKER, OTP_ENTRY):
             otp = get_otp()
             # You will tell me the exact element for OTP input
             print(f'Auto-filling OTP: {otp}')
@@ -346,49 +385,57 @@ def login_with_credentials(driver, username, password):
     WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.NAME, 'loginfmt')))
     driver.find_element(By.NAME, 'loginfmt').send_keys(username)
     driver.find_element(By.ID, 'idSIButton9').click()
-    time.sleep(2)
-    WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.NAME, 'passwd')))
-    driver.find_element(By.NAME, 'passwd').send_keys(password)
+    WebDriverWait(driver, STEP_BUDGETS['username_submit']).until(EC.visibility_of_element_located((By.NAME, 'passwd')))
+    pwd_input = driver.find_element(By.NAME, 'passwd')
+    pwd_input.send_keys(password)
     driver.find_element(By.ID, 'idSIButton9').click()
-    time.sleep(2)
-    # Continuously check and tick '不再显示此消息' checkbox, then click '是' button until navigation
-    for _ in range(30):  # up to 30 seconds
+    wait_after_submit(driver, pwd_input, 'password_submit')
+    # Tick '不再显示此消息' and click '是' each time the prompt appears, until it stops appearing
+    confirm_prompts(driver)
+
+KMSI_BUTTON_VALUES = ['是', '下一步', 'Yes', '同意', '确认', '继续', '登录', 'Sign in', 'Accept', 'Next', 'Continue']
+
+
+def _kmsi_confirm_button(driver):
+    """Return the visible primary submit button on a KMSI/consent prompt, or None."""
+    try:
+        for btn in driver.find_elements(By.CSS_SELECTOR, "input[type='submit'].button_primary"):
+            btn_value = btn.get_attribute('value') or ''
+            if btn.is_displayed() and btn.is_enabled() and any(x in btn_value for x in KMSI_BUTTON_VALUES):
+                return btn
+    except Exception:
+        return None
+    return None
+
+
+def confirm_prompts(driver, max_prompts=5):
+    """Tick KMSI and confirm each prompt as it appears; stop once none shows up within the step budget."""
+    for _ in range(max_prompts):
+        if 'login.microsoftonline.com' not in driver.current_url:
+            return
         try:
-            # Tick the checkbox if present and not already selected
-            try:
-                kmsi_checkbox = driver.find_element(By.ID, "KmsiCheckboxField")
-                if kmsi_checkbox.is_displayed() and kmsi_checkbox.is_enabled() and not kmsi_checkbox.is_selected():
-                    print("Ticking '不再显示此消息' checkbox...")
-                    kmsi_checkbox.click()
-                    time.sleep(0.5)
-            except Exception:
-                pass
-            # Find the confirmation button robustly (submit, class contains 'button_primary', value is '是')
-            btn_candidates = driver.find_elements(By.CSS_SELECTOR, "input[type='submit'].button_primary")
-            btn_clicked = False
-            for btn in btn_candidates:
-                btn_class = btn.get_attribute('class') or ''
-                btn_value = btn.get_attribute('value') or ''
-                print(f"Found button: class={btn_class}, value={btn_value}")
-                match_values = ['是', '下一步', 'Yes', '同意', '确认', '继续', '登录', 'Sign in', 'Accept', 'Next', 'Continue']
-                if btn.is_displayed() and btn.is_enabled() and any(x in btn_value for x in match_values):
-                    print(f"Attempting to click button with value '{btn_value}' ...")
-                    try:
-                        btn.click()
-                        print(f"Clicked button '{btn_value}' with normal click.")
-                    except Exception:
-                        print("Normal click failed, trying JS click...")
-                        driver.execute_script("arguments[0].click();", btn)
-                        print(f"Clicked button '{btn_value}' with JS click.")
-                    time.sleep(1)
-                    btn_clicked = True
-                    break
-            if not btn_clicked:
-                print("No clickable main button found, waiting...")
-                time.sleep(1)
-        except Exception as e:
-            print(f"Exception in confirmation loop: {e}")
-            break  # Button not present, stop loop
+            kmsi_checkbox = driver.find_element(By.ID, "KmsiCheckboxField")
+            if kmsi_checkbox.is_displayed() and kmsi_checkbox.is_enabled() and not kmsi_checkbox.is_selected():
+                print("Ticking '不再显示此消息' checkbox...")
+                kmsi_checkbox.click()
+                wait_for_selected(driver, kmsi_checkbox, 'kmsi_checkbox')
+        except Exception:
+            pass
+        btn = wait_until(driver, _kmsi_confirm_button, STEP_BUDGETS['kmsi_submit'])
+        if btn is None:
+            print("No confirmation prompt found; continuing.")
+            return
+        btn_value = btn.get_attribute('value') or ''
+        print(f"Attempting to click button with value '{btn_value}' ...")
+        try:
+            btn.click()
+            print(f"Clicked button '{btn_value}' with normal click.")
+        except Exception:
+            print("Normal click failed, trying JS click...")
+            driver.execute_script("arguments[0].click();", btn)
+            print(f"Clicked button '{btn_value}' with JS click.")
+        wait_after_submit(driver, btn, 'kmsi_submit')
+
 
 def fill_otp(driver):
     try:
@@ -403,71 +450,39 @@ def fill_otp(driver):
             EC.element_to_be_clickable((By.CSS_SELECTOR, '[data-testid="reskin-step-next-button"]'))
         )
         btn_otp_next.click()
-        time.sleep(1)
+        wait_after_submit(driver, otp_input, 'otp_submit')
         return True
     except Exception as e:
         print(f'OTP input not found or not needed: {e}')
         return False
 
 
-def fill_ms_login(driver, username, password):
-    """Robust fill for Microsoft login page (prefers password-first)."""
+def fill_ms_login(driver, username, password, deadline=None):
+    """Robust fill for Microsoft login page (prefers password-first); waits stop at ``deadline``."""
+    stats = get_selector_stats()
     try:
-        click_by_xpath_contains_text(driver, 'Accept', timeout=2)  # cookie banner if any
+        click_with_retries(driver, [(By.XPATH, _text_xpath('Accept'), "text: Accept")], attempts=2, delay=1.0, deadline=deadline)  # cookie banner if any
         maybe_switch_to_login_iframe(driver)
 
         # Account picker
-        candidates = [username, username.split('@')[0], 'Use another account', 'Other account']
-        for text in candidates:
-            if click_by_xpath_contains_text(driver, text, timeout=3):
-                break
-
-        def visible_el(by, sel, wait=8):
-            try:
-                el = WebDriverWait(driver, wait).until(EC.presence_of_element_located((by, sel)))
-                if el.is_displayed():
-                    return el
-            except Exception:
-                return None
-            return None
-
-        pwd_input = visible_el(By.ID, 'i0118') or visible_el(By.NAME, 'passwd')
-
-        user_input = None
-        for by, sel in [(By.NAME, 'loginfmt'), (By.ID, 'i0116')]:
-            el = visible_el(by, sel)
-            if el:
-                user_input = el
-                break
-
-        if user_input:
-            user_input.clear()
-            driver.execute_script("arguments[0].focus();", user_input)
-            try:
-                user_input.send_keys(username)
-            except Exception:
-                driver.execute_script("arguments[0].value = arguments[1];", user_input, username)
-            try:
-                btn = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.ID, 'idSIButton9')))
-                driver.execute_script("arguments[0].click();", btn)
-            except Exception:
-                pass
-            time.sleep(1.0)
-            pwd_input = visible_el(By.ID, 'i0118') or visible_el(By.NAME, 'passwd')
+        click_with_retries(driver, account_picker_candidates(username), attempts=3, delay=1.0, step='account_picker', deadline=deadline)
+
+        # Password first: on the password page the loginfmt input is still in the DOM, parked off-screen
+        pwd_input, _ = stats.probe(driver, 'password_input', PASSWORD_INPUT_CANDIDATES, timeout=capped(PASSWORD_FIRST_TIMEOUT, deadline))
+        if pwd_input is None:
+            user_input, _ = stats.probe(driver, 'username_input', USERNAME_INPUT_CANDIDATES, timeout=capped(8, deadline))
+            if user_input is not None:
+                _fill_input(driver, user_input, username)
+                click_with_retries(driver, [(By.ID, 'idSIButton9', 'idSIButton9')], attempts=10, delay=1.0, deadline=deadline)
+                # Password field appears in place once the username step is accepted
+                pwd_input, _ = stats.probe(
+                    driver, 'password_input', PASSWORD_INPUT_CANDIDATES, timeout=capped(STEP_BUDGETS['username_submit'], deadline)
+                )
 
-        if pwd_input:
-            pwd_input.clear()
-            driver.execute_script("arguments[0].focus();", pwd_input)
-            try:
-                pwd_input.send_keys(password)
-            except Exception:
-                driver.execute_script("arguments[0].value = arguments[1];", pwd_input, password)
-            try:
-                btn = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.ID, 'idSIButton9')))
-                driver.execute_script("arguments[0].click();", btn)
-            except Exception:
-                pass
-            time.sleep(1.0)
+        if pwd_input is not None:
+            _fill_input(driver, pwd_input, password)
+            click_with_retries(driver, [(By.ID, 'idSIButton9', 'idSIButton9')], attempts=10, delay=1.0, deadline=deadline)
+            wait_after_submit(driver, pwd_input, 'password_submit', deadline=deadline)
             return True
 
         print("Password input not found or not interactable.")
@@ -477,122 +492,59 @@ def fill_ms_login(driver, username, password):
         return False
 
 
-def handle_mfa_code(driver):
+def _choose_verification_code(driver, deadline=None):
+    """Open the alternative methods list and pick 'Use a verification code'; returns the OTP input or None."""
+    # Step 1: open alternative methods
+    click_with_retries(driver, ALTERNATIVE_METHOD_CANDIDATES, attempts=6, delay=1.0, step='alternative_method', deadline=deadline)
+
+    # Step 2: choose verification code and wait for OTP input
+    for _ in range(2):
+        chosen = click_with_retries(driver, VERIFICATION_CODE_CANDIDATES, attempts=10, delay=1.0, step='verification_code', deadline=deadline)
+
+        if not chosen:
+            print("Could not select 'Use a verification code'.")
+            return None
+
+        print("Waiting for OTP input after clicking verification code option...")
+        otp_input, _ = get_selector_stats().probe(driver, 'otp_input', OTP_INPUT_CANDIDATES, timeout=capped(12, deadline))
+        if otp_input:
+            return otp_input
+        # The tile matched but clicking it did not open the code entry
+        get_selector_stats().record_failure('verification_code', chosen[2])
+        print("OTP input still not visible; retrying click on verification code option...")
+    return None
+
+
+def handle_mfa_code(driver, otp_config=CONFIG_FILE, deadline=None):
     """Fallback path: use verification code instead of Authenticator app."""
     try:
         maybe_switch_to_login_iframe(driver)
-        # Step 1: open alternative methods
-        try:
-            alt_link = WebDriverWait(driver, 6).until(
-                EC.element_to_be_clickable((By.ID, 'signInAnotherWay'))
-            )
-            driver.execute_script("arguments[0].click();", alt_link)
-            print("Clicked 'signInAnotherWay' link")
-        except Exception:
-            click_by_xpath_contains_text(driver, "I can't use my Microsoft Authenticator app right now", timeout=5)
-
-        # Step 2: choose verification code and wait for OTP input
-        candidates = [
-            (By.CSS_SELECTOR, "div.table[role='button'][data-value='PhoneAppOTP']", "PhoneAppOTP table role button"),
-            (By.CSS_SELECTOR, "#idDiv_SAOTCS_Proofs div.table[role='button'][data-value='PhoneAppOTP']", "PhoneAppOTP table inside proofs"),
-            (By.CSS_SELECTOR, "div[role='button'][data-value='PhoneAppOTP']", "PhoneAppOTP role button"),
-            (By.CSS_SELECTOR, "[data-value='PhoneAppOTP']", "PhoneAppOTP data-value"),
-            (By.CSS_SELECTOR, "div.row.tile [data-value='PhoneAppOTP']", "row tile data-value PhoneAppOTP"),
-            (By.CSS_SELECTOR, "div.row.tile", "row tile"),
-            (By.CSS_SELECTOR, "div.row.tile[role='listitem']", "row tile listitem"),
-            (By.CSS_SELECTOR, "#idDiv_SAOTCS_Proofs > div:nth-child(2) > div > div > div.table-cell.text-left.content > div", "provided CSS"),
-            (By.XPATH, "//*[@id='idDiv_SAOTCS_Proofs']/div[2]/div/div/div[2]/div", "provided XPath"),
-            (By.XPATH, "/html/body/div/form[1]/div/div/div[2]/div[1]/div/div/div/div/div/div[2]/div[2]/div/div[2]/div/div[2]/div[2]/div[2]/div/div/div[2]/div", "provided absolute XPath"),
-            (By.CSS_SELECTOR, "#idDiv_SAOTCS_Proofs .table-row", "tile row"),
-            (By.CSS_SELECTOR, "#idDiv_SAOTCS_Proofs .table-row .table-cell.text-left.content", "tile content cell"),
-            (By.XPATH, "//*[@id='idDiv_SAOTCS_Proofs']//div[contains(@class,'table-row')]//div[contains(@class,'text-left')]/div[contains(normalize-space(.), 'Use a verification code')]/ancestor::div[contains(@class,'table-row')][1]", "table-row ancestor of text"),
-            (By.XPATH, "//img[contains(@src,'picker_verify_code')]/ancestor::div[contains(@class,'table-row')][1]", "verify-code image row"),
-            (By.CSS_SELECTOR, "img[src*='picker_verify_code']", "verify-code img"),
-            (By.CSS_SELECTOR, "#idDiv_SAOTCS_Proofs", "proofs container"),
-            (By.XPATH, "//*[@id='idDiv_SAOTCS_Proofs']//div[contains(normalize-space(.), 'Use a verification code')]/parent::*", "text parent"),
-            (By.XPATH, "//*[@id='idDiv_SAOTCS_Proofs']//div[contains(normalize-space(.), 'Use a verification code')]/parent::div/parent::div", "text grandparent"),
-            (By.XPATH, "//*[@id='idDiv_SAOTCS_Proofs']//div[contains(@class,'table-cell')][.//div[contains(normalize-space(.), 'Use a verification code')]]", "cell containing text"),
-        ]
-
-        otp_input = None
-        for _ in range(2):
-            chosen = False
-            if click_with_retries(driver, candidates, attempts=6, delay=0.8):
-                chosen = True
-            elif click_by_xpath_contains_text(driver, "Use a verification code", timeout=5):
-                chosen = True
-            elif click_by_xpath_contains_text(driver, "Use verification code", timeout=5):
-                chosen = True
-            else:
-                try:
-                    elem = WebDriverWait(driver, 6).until(
-                        EC.presence_of_element_located((By.XPATH, "//div[contains(normalize-space(.), 'Use a verification code')]/ancestor::*[self::button or self::a or @role='button' or @tabindex='0'][1]"))
-                    )
-                    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", elem)
-                    driver.execute_script("arguments[0].click();", elem)
-                    print("Clicked ancestor container for 'Use a verification code'")
-                    chosen = True
-                except Exception:
-                    pass
-
-            if not chosen:
-                print("Could not select 'Use a verification code'.")
-                return False
-
-            print("Waiting for OTP input after clicking verification code option...")
-            selectors = [
-                (By.NAME, 'otc'),
-                (By.ID, 'idTxtBx_SAOTCC_OTC'),
-                (By.CSS_SELECTOR, 'input[data-testid="verification-entercode-input"]'),
-                (By.CSS_SELECTOR, 'input[name="otc"]'),
-            ]
-            for by, sel in selectors:
-                try:
-                    otp_input = WebDriverWait(driver, 12).until(EC.element_to_be_clickable((by, sel)))
-                    break
-                except Exception:
-                    continue
-            if otp_input:
-                break
-            else:
-                print("OTP input still not visible; retrying click on verification code option...")
+        if classify_page(driver) == OTP_ENTRY:
+            otp_input, _ = get_selector_stats().probe(driver, 'otp_input', OTP_INPUT_CANDIDATES, timeout=capped(12, deadline))
+        else:
+            otp_input = _choose_verification_code(driver, deadline)
 
         if not otp_input:
             print("OTP input not found after clicking verification code option.")
             return False
 
         otp_input.clear()
-        otp = get_otp()
+        otp = get_otp(otp_config)
         otp_input.send_keys(otp)
         print(f"Filled OTP: {otp}")
 
-        verify_selectors = [
-            (By.ID, 'idSubmit_SAOTCC_Continue'),
-            (By.CSS_SELECTOR, '[data-testid="reskin-step-next-button"]'),
-        ]
-        clicked = False
-        for by, sel in verify_selectors:
-            try:
-                btn = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((by, sel)))
-                driver.execute_script("arguments[0].click();", btn)
-                clicked = True
-                break
-            except Exception:
-                continue
-        if not clicked:
-            if click_by_xpath_contains_text(driver, 'Verify', timeout=5):
-                clicked = True
+        clicked = click_with_retries(driver, OTP_VERIFY_CANDIDATES, attempts=10, delay=1.0, step='otp_verify', deadline=deadline)
         if not clicked:
             print("Verify button not found.")
             return False
-        time.sleep(2)
+        wait_after_submit(driver, otp_input, 'otp_submit', deadline=deadline)
         return True
     except Exception as e:
         print(f"MFA fallback failed: {e}")
         return False
 
 
-def handle_kmsi(driver):
+def handle_kmsi(driver, deadline=None):
     """Tick 'Don't show this again' (KMSI) and confirm Yes/Next."""
     try:
         kmsi_checkbox = driver.find_element(By.ID, "KmsiCheckboxField")
@@ -603,59 +555,54 @@ def handle_kmsi(driver):
             except Exception:
                 driver.execute_script("arguments[0].click();", kmsi_checkbox)
             print("Ticked KMSI checkbox")
-            time.sleep(0.3)
+            wait_for_selected(driver, kmsi_checkbox, 'kmsi_checkbox', deadline=deadline)
     except Exception:
         pass
 
-    candidates = [
-        (By.ID, 'idSIButton9', 'idSIButton9'),
-        (By.CSS_SELECTOR, "input[type='submit'].button_primary", "button_primary submit"),
-        (By.XPATH, "//input[@type='submit' and (contains(@value,'Yes') or contains(@value,'是') or contains(@value,'继续') or contains(@value,'Next') or contains(@value,'Sign in'))]", "submit value match"),
-        (By.XPATH, "//button[contains(normalize-space(.), 'Yes') or contains(normalize-space(.), '是') or contains(normalize-space(.), '继续') or contains(normalize-space(.), 'Next') or contains(normalize-space(.), 'Sign in') or contains(normalize-space(.), 'Accept') or contains(normalize-space(.), '登录') or contains(normalize-space(.), '同意')]", "button text match"),
-    ]
-    if click_with_retries(driver, candidates, attempts=5, delay=0.6):
+    if click_with_retries(driver, KMSI_CONFIRM_CANDIDATES, attempts=6, delay=1.0, step='kmsi_confirm', deadline=deadline):
         print("Clicked KMSI confirmation button")
         return True
-    if click_by_xpath_contains_text(driver, 'Yes', timeout=3) or click_by_xpath_contains_text(driver, 'Next', timeout=3):
-        print("Clicked KMSI confirmation via text fallback")
-        return True
     print("KMSI confirmation button not found")
     return False
 
 
-def renew_login(driver, expected_url=None):
-    """Non-first login: fill credentials, handle MFA, KMSI."""
-    creds = load_credentials()
+def renew_login(driver, expected_url=None, deadline=None, profile_dir=None):
+    """Non-first login: fill credentials, handle MFA, KMSI, bounded by ``deadline`` (epoch seconds).
+
+    ``profile_dir`` holds that profile's credentials.json and 2fa_config.json;
+    the working directory is used when it is None.
+    """
+    base_dir = profile_dir or ''
+    creds = load_credentials(os.path.join(base_dir, CREDENTIALS_FILE))
+    otp_config = os.path.join(base_dir, CONFIG_FILE)
     if not creds or 'username' not in creds or 'password' not in creds:
         print('credentials.json missing username/password; cannot auto-login.')
         return False
     username = creds['username']
     password = creds['password']
 
-    try:
-        current_url = driver.current_url
-        page_src = driver.page_source
-        if ('login.microsoftonline.com' in current_url) or ('mysignins.microsoft.com' in current_url) or ('loginfmt' in page_src):
-            print("Detected Microsoft login page; attempting auto login...")
-            fill_ms_login(driver, username, password)
-            handle_mfa_code(driver)
-            handle_kmsi(driver)
-        else:
-            print("No Microsoft login page detected; skipping renew_login.")
-            return True
+    def fill_credentials(d, step_deadline):
+        return fill_ms_login(d, username, password, deadline=step_deadline)
 
+    def is_done(d):
+        url = d.current_url
         if expected_url:
-            try:
-                WebDriverWait(driver, 60).until(EC.url_contains(expected_url))
-                print("Login detected via URL match.")
-                return True
-            except Exception:
-                print("Login not detected within timeout.")
-                return False
-        return True
+            return expected_url in url
+        return not is_ms_login_url(url)
+
+    handlers = {
+        MS_USERNAME: fill_credentials,
+        MS_PASSWORD: fill_credentials,
+        MFA_PICKER: lambda d, step_deadline: handle_mfa_code(d, otp_config, deadline=step_deadline),
+        OTP_ENTRY: lambda d, step_deadline: handle_mfa_code(d, otp_config, deadline=step_deadline),
+        KMSI: handle_kmsi,
+    }
+    try:
+        return LoginStateMachine(handlers, is_done, deadline=deadline).run(driver)
     except Exception as e:
         print(f"renew_login failed: {e}")
         return False
-    
+
+
 if __name__ == '__main__':
     first_time_setup()
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+
+CACHE_FILE = 'ics_cache.json'
+CACHE_VERSION = 1
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def default_cache_path(ics_path):
+    """Cache lives beside the ics/ folder, not inside it, so it is never mistaken for a timetable."""
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(ics_path))), CACHE_FILE)
+
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != CACHE_VERSION:
+            return None
+        return data
+    except Exception:
+        return None
+
+
+def _write_cache(cache_path, data):
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_path, cache_path)
+
+
+def load_events(ics_path, parse, cache_path=None, logger=None):
+    """Return future events as (start_epoch, end_epoch, name) tuples.
+
+    ``parse`` is only called when the cache is missing or stale; it must return
+    an iterable of (start_epoch, end_epoch, name) for the whole file.
+    """
+    logger = logger or logging.getLogger("attendance_bot")
+    cache_path = cache_path or default_cache_path(ics_path)
+    stat = os.stat(ics_path)
+    now = time.time()
+
+    data = _read_cache(cache_path)
+    digest = None
+    if data is not None and (data.get('mtime_ns'), data.get('size')) != (stat.st_mtime_ns, stat.st_size):
+        # mtime moved (copy, touch, git checkout); only the content hash decides
+        digest = file_digest(ics_path)
+        if data.get('sha256') != digest:
+            data = None
+        else:
+            data['mtime_ns'] = stat.st_mtime_ns
+            data['size'] = stat.st_size
+            try:
+                _write_cache(cache_path, data)
+            except OSError:
+                pass
+
+    if data is not None:
+        events = [(start, end, sys.intern(name)) for start, end, name in data['events'] if start > now]
+        logger.info(f"Loaded {len(events)} events from calendar cache.")
+        return events
+
+    events = sorted((start, end, sys.intern(name)) for start, end, name in parse() if start > now)
+    data = {
+        'version': CACHE_VERSION,
+        'sha256': digest or file_digest(ics_path),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'events': events,
+    }
+    try:
+        _write_cache(cache_path, data)
+    except OSError as e:
+        logger.warning(f"Failed to write calendar cache: {e}")
+    return events
@@ -0,0 +1,272 @@
+import json
+import logging
+import os
+import signal
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+PID_FILE = 'chrome_pids.json'
+# Resident memory (MB) all Chromes together may use before new launches wait
+DEFAULT_MEMORY_BUDGET_MB = 1536
+# Typical RSS of one logged-in Chrome on the attendance page, browser plus renderers
+DEFAULT_EXPECTED_INSTANCE_MB = 350
+KILL_GRACE_SECONDS = 3
+
+_PROC = '/proc'
+
+
+def _proc_available():
+    return os.path.isdir(os.path.join(_PROC, 'self'))
+
+
+def _read_stat(pid):
+    """Return (name, ppid, start_ticks) from /proc/<pid>/stat, or None."""
+    try:
+        with open(os.path.join(_PROC, str(pid), 'stat'), 'r') as f:
+            data = f.read()
+    except OSError:
+        return None
+    # The command name is parenthesised and may itself contain spaces or parentheses
+    name = data[data.index('(') + 1:data.rindex(')')]
+    fields = data[data.rindex(')') + 2:].split()
+    return name, int(fields[1]), fields[19]
+
+
+def _start_marker(pid):
+    """Opaque process start time, used to tell a live process from a reused PID."""
+    if psutil is not None:
+        try:
+            return str(psutil.Process(pid).create_time())
+        except psutil.Error:
+            return None
+    if _proc_available():
+        stat = _read_stat(pid)
+        return stat[2] if stat else None
+    return None
+
+
+def _process_name(pid):
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).name()
+        except psutil.Error:
+            return ''
+    stat = _read_stat(pid) if _proc_available() else None
+    return stat[0] if stat else ''
+
+
+def _descendants(pid):
+    if psutil is not None:
+        try:
+            return [child.pid for child in psutil.Process(pid).children(recursive=True)]
+        except psutil.Error:
+            return []
+    if not _proc_available():
+        return []
+    children = {}
+    for entry in os.listdir(_PROC):
+        if entry.isdigit():
+            stat = _read_stat(int(entry))
+            if stat:
+                children.setdefault(stat[1], []).append(int(entry))
+    found, stack = [], [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def _rss_bytes(pid):
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return 0
+    try:
+        with open(os.path.join(_PROC, str(pid), 'status'), 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def _is_alive(pid, marker):
+    return marker is not None and _start_marker(pid) == marker
+
+
+def _kill(pids):
+    """SIGTERM, then SIGKILL whatever is still there after a short grace period."""
+    if psutil is not None:
+        procs = []
+        for pid in pids:
+            try:
+                proc = psutil.Process(pid)
+                proc.terminate()
+                procs.append(proc)
+            except psutil.Error:
+                pass
+        _, alive = psutil.wait_procs(procs, timeout=KILL_GRACE_SECONDS)
+        for proc in alive:
+            try:
+                proc.kill()
+            except psutil.Error:
+                pass
+        return
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            pass
+    deadline = time.monotonic() + KILL_GRACE_SECONDS
+    remaining = list(pids)
+    while remaining and time.monotonic() < deadline:
+        time.sleep(0.1)
+        remaining = [pid for pid in remaining if _read_stat(pid)]
+    for pid in remaining:
+        try:
+            os.kill(pid, getattr(signal, 'SIGKILL', signal.SIGTERM))
+        except OSError:
+            pass
+
+
+class ChromeSupervisor:
+    """Track the chromedriver/Chrome processes this bot starts, cap their memory and reap leftovers.
+
+    Every launched tree is recorded in a PID file (with process start times, so a
+    reused PID is never touched), which lets the next start-up kill trees a crash
+    left behind. Uses psutil when installed and /proc otherwise; with neither,
+    tracking is skipped and admission always succeeds.
+    """
+
+    def __init__(self, pid_file=PID_FILE, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB,
+                 expected_instance_mb=DEFAULT_EXPECTED_INSTANCE_MB, logger=None):
+        self.pid_file = pid_file
+        self.memory_budget_mb = memory_budget_mb
+        self.expected_instance_mb = expected_instance_mb
+        self.logger = logger or logging.getLogger("attendance_bot")
+        self.enabled = psutil is not None or _proc_available()
+        self._lock = threading.Lock()
+        # root pid -> {pid: start marker} for the whole tree seen so far
+        self._trees = {}
+
+    def _save(self):
+        records = {str(root): tree for root, tree in self._trees.items()}
+        tmp_path = self.pid_file + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(records, f)
+            os.replace(tmp_path, self.pid_file)
+        except OSError as e:
+            self.logger.warning(f"Failed to write {self.pid_file}: {e}")
+
+    def _refresh(self, root):
+        tree = self._trees[root]
+        for pid in [root] + _descendants(root):
+            if pid not in tree:
+                marker = _start_marker(pid)
+                if marker:
+                    tree[pid] = marker
+
+    def register(self, driver):
+        """Start tracking the chromedriver behind ``driver`` and the Chrome it launched."""
+        if not self.enabled:
+            return
+        try:
+            root = driver.service.process.pid
+        except AttributeError:
+            return
+        with self._lock:
+            self._trees[root] = {}
+            self._refresh(root)
+            self._save()
+
+    def release(self, driver):
+        """After driver.quit(): kill anything of that tree that is still running."""
+        if not self.enabled:
+            return
+        try:
+            root = driver.service.process.pid
+        except AttributeError:
+            return
+        with self._lock:
+            tree = self._trees.pop(root, None)
+            self._save()
+        if tree:
+            self._kill_tree(tree, reason="after quit")
+
+    def _kill_tree(self, tree, reason):
+        alive = [pid for pid, marker in tree.items() if _is_alive(pid, marker)]
+        if not alive:
+            return
+        # Pick up renderers spawned since the tree was last refreshed
+        for pid in list(alive):
+            alive.extend(child for child in _descendants(pid) if child not in alive)
+        self.logger.warning(f"Killing {len(alive)} leftover Chrome/chromedriver processes ({reason}).")
+        _kill(alive)
+
+    def reap(self):
+        """Kill trees whose chromedriver has died but whose Chrome is still running."""
+        if not self.enabled:
+            return
+        with self._lock:
+            dead_roots = [root for root, tree in self._trees.items() if not _is_alive(root, tree.get(root))]
+            orphans = [self._trees.pop(root) for root in dead_roots]
+            if orphans:
+                self._save()
+        for tree in orphans:
+            self._kill_tree(tree, reason="chromedriver exited")
+
+    def reap_stale(self):
+        """Start-up: kill every tree recorded by a previous run, then start a fresh PID file."""
+        if not self.enabled:
+            return
+        try:
+            with open(self.pid_file, 'r') as f:
+                records = json.load(f)
+        except Exception:
+            records = {}
+        for tree in records.values():
+            tree = {int(pid): marker for pid, marker in tree.items()}
+            # Only touch processes that still look like Chrome, in case the PID was reused
+            tree = {pid: marker for pid, marker in tree.items() if 'chrom' in _process_name(pid).lower()}
+            self._kill_tree(tree, reason="left by a previous run")
+        with self._lock:
+            self._save()
+
+    def rss_mb(self, driver=None):
+        """Current resident memory of all tracked trees, or only ``driver``'s, in MB."""
+        root_filter = None
+        if driver is not None:
+            try:
+                root_filter = driver.service.process.pid
+            except AttributeError:
+                return 0.0
+        with self._lock:
+            for root, tree in self._trees.items():
+                self._refresh(root)
+                for pid in [pid for pid, marker in tree.items() if pid != root and not _is_alive(pid, marker)]:
+                    del tree[pid]
+            pids = [pid for root, tree in self._trees.items() if root_filter in (None, root) for pid in tree]
+        return sum(_rss_bytes(pid) for pid in pids) / (1024 * 1024)
+
+    def admit(self):
+        """True if one more Chrome fits in the memory budget (always True when none is running)."""
+        with self._lock:
+            if not self._trees:
+                return True
+        used = self.rss_mb()
+        if used + self.expected_instance_mb <= self.memory_budget_mb:
+            return True
+        self.logger.info(
+            f"Chrome memory {used:.0f} MB + {self.expected_instance_mb} MB would exceed the "
+            f"{self.memory_budget_mb} MB budget; waiting for a browser to close."
+        )
+        return False
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import re
+import sysconfig
+from importlib import metadata
+
+CACHE_FILE = 'deps_cache.json'
+
+_REQUIREMENT_RE = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*([^;]*)(;.*)?$')
+_SPEC_RE = re.compile(r'^\s*(~=|===|==|!=|<=|>=|<|>)\s*([^\s,]+)\s*$')
+
+
+def _site_packages_mtime():
+    """Newest mtime of the environment's site-packages dirs; installs and removals bump it."""
+    mtimes = []
+    for key in ('purelib', 'platlib'):
+        path = sysconfig.get_paths().get(key)
+        if path and os.path.isdir(path):
+            mtimes.append(os.stat(path).st_mtime_ns)
+    return max(mtimes) if mtimes else 0
+
+
+def _version_tuple(version):
+    parts = []
+    for piece in re.split(r'[.+-]', version):
+        match = re.match(r'\d+', piece)
+        if not match:
+            break
+        parts.append(int(match.group()))
+    return tuple(parts)
+
+
+def _fallback_spec_matches(spec, version):
+    """Minimal PEP 440 comparison for when ``packaging`` is not installed."""
+    for clause in filter(None, (c.strip() for c in spec.split(','))):
+        match = _SPEC_RE.match(clause)
+        if not match:
+            continue
+        op, wanted = match.groups()
+        if op in ('==', '!=') and wanted.endswith('.*'):
+            prefix = _version_tuple(wanted[:-2])
+            equal = _version_tuple(version)[:len(prefix)] == prefix
+            if equal != (op == '=='):
+                return False
+            continue
+        have, want = _version_tuple(version), _version_tuple(wanted)
+        prefix = want[:-1]
+        width = max(len(have), len(want))
+        have, want = have + (0,) * (width - len(have)), want + (0,) * (width - len(want))
+        if op == '~=':
+            ok = have >= want and have[:len(prefix)] == prefix
+        else:
+            ok = {
+                '==': have == want, '===': version == wanted, '!=': have != want,
+                '<=': have <= want, '>=': have >= want, '<': have < want, '>': have > want,
+            }[op]
+        if not ok:
+            return False
+    return True
+
+
+def _parse_requirement(line):
+    """Return (name, matches(version) callable) or None for lines that do not apply here."""
+    try:
+        from packaging.requirements import Requirement
+    except ImportError:
+        Requirement = None
+    if Requirement is not None:
+        req = Requirement(line)
+        if req.marker is not None and not req.marker.evaluate():
+            return None
+        return req.name, lambda version: req.specifier.contains(version, prereleases=True)
+    match = _REQUIREMENT_RE.match(line)
+    if not match:
+        raise ValueError(f"Unrecognised requirement: {line}")
+    name, _, spec, _ = match.groups()
+    return name, lambda version: _fallback_spec_matches(spec, version)
+
+
+def _installed_version(name):
+    for candidate in (name, name.replace('-', '_'), name.replace('_', '-')):
+        try:
+            return metadata.version(candidate)
+        except metadata.PackageNotFoundError:
+            continue
+    return None
+
+
+def find_unmet(requirements_file):
+    """Return requirement lines that are missing or whose installed version does not match."""
+    unmet = []
+    with open(requirements_file, 'r') as f:
+        for raw in f:
+            line = raw.split('#', 1)[0].strip()
+            if not line or line.startswith('-'):
+                continue
+            parsed = _parse_requirement(line)
+            if parsed is None:
+                continue
+            name, matches = parsed
+            version = _installed_version(name)
+            if version is None or not matches(version):
+                unmet.append(line if version is None else f"{line} (installed {version})")
+    return unmet
+
+
+def _cache_key(requirements_file):
+    with open(requirements_file, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return {'requirements_sha256': digest, 'site_packages_mtime': _site_packages_mtime()}
+
+
+def check_cached(requirements_file, cache_path=CACHE_FILE):
+    """Like find_unmet, but returns [] straight away when neither requirements nor the venv changed."""
+    key = _cache_key(requirements_file)
+    try:
+        with open(cache_path, 'r') as f:
+            if json.load(f) == key:
+                return []
+    except Exception:
+        pass
+    unmet = find_unmet(requirements_file)
+    if not unmet:
+        try:
+            with open(cache_path, 'w') as f:
+                json.dump(key, f)
+        except OSError:
+            pass
+    return unmet
@@ -1,23 +1,73 @@
 import json
 import logging
 import os
+import queue
+import threading
+import time
 from datetime import datetime
 
-import requests
-
 DEFAULT_TIMEOUT = 5
+DEFAULT_QUEUE_SIZE = 100
+DEFAULT_FLUSH_TIMEOUT = 5
+COALESCE_SECONDS = 2
+MAX_ATTEMPTS = 3
+MAX_RETRY_AFTER = 60
+MAX_MESSAGE_LENGTH = 2000  # Discord's content limit
+OUTBOX_FILE = 'discord_outbox.jsonl'
+
+
+def _retry_after_seconds(resp):
+    """Seconds to wait after a 429, from the header or Discord's JSON body."""
+    value = resp.headers.get('Retry-After')
+    if value is None:
+        try:
+            value = resp.json().get('retry_after')
+        except Exception:
+            value = None
+    try:
+        return min(max(float(value), 0.0), MAX_RETRY_AFTER)
+    except (TypeError, ValueError):
+        return 1.0
+
+
+def _chunk_messages(messages):
+    """Join messages with newlines into as few posts as fit Discord's length limit."""
+    chunk = ''
+    for message in messages:
+        message = message[:MAX_MESSAGE_LENGTH]
+        if chunk and len(chunk) + 1 + len(message) > MAX_MESSAGE_LENGTH:
+            yield chunk
+            chunk = ''
+        chunk = f"{chunk}\n{message}" if chunk else message
+    if chunk:
+        yield chunk
 
 
 class DiscordBroadcaster:
-    """Lightweight Discord webhook broadcaster with profile prefixing."""
+    """Lightweight Discord webhook broadcaster with profile prefixing.
+
+    Messages are queued and posted by a background worker over a keep-alive
+    session, so a slow webhook never delays attendance marking or shutdown.
+    """
 
-    def __init__(self, credentials_path='credentials.json', logger=None, profile_name=None):
+    def __init__(self, credentials_path='credentials.json', logger=None, profile_name=None, queue_size=DEFAULT_QUEUE_SIZE):
         self.logger = logger or logging.getLogger("attendance_bot")
         self.credentials_path = credentials_path
         self.webhook_url = None
         self.enabled = False
         self.profile_name = profile_name or "Unknown"
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._session = None
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        # Posts the worker has taken off the queue but not yet delivered or spooled
+        self._in_flight = []
+        self._in_flight_lock = threading.Lock()
+        self._abandoned = False
+        self.outbox_path = os.path.join(os.path.dirname(os.path.abspath(credentials_path)), OUTBOX_FILE)
         self._load_settings()
+        if self.enabled:
+            self._replay_outbox()
 
     def _load_settings(self):
         try:
@@ -32,22 +82,176 @@ class DiscordBroadcaster:
             self.enabled = False
             self.webhook_url = None
 
+    def _ensure_worker(self):
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="discord-broadcast", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            message = self._queue.get()
+            if message is None:
+                self._queue.task_done()
+                return
+            # Coalesce a burst of notifications into as few posts as possible
+            batch = [message]
+            stop = False
+            deadline = time.monotonic() + COALESCE_SECONDS
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    message = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if message is None:
+                    stop = True
+                    break
+                batch.append(message)
+            chunks = list(_chunk_messages(batch))
+            with self._in_flight_lock:
+                if self._abandoned:
+                    # Taken off the queue after close() gave up waiting: spool instead of posting
+                    for content in chunks:
+                        self._spool(content)
+                    chunks = []
+                self._in_flight = list(chunks)
+            try:
+                for content in chunks:
+                    delivered = self._deliver(content)
+                    with self._in_flight_lock:
+                        if self._abandoned:
+                            # close() has already spooled this batch
+                            break
+                        self._in_flight.pop(0)
+                        if not delivered:
+                            self._spool(content)
+            finally:
+                for _ in range(len(batch) + stop):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _deliver(self, message):
+        """Post one message, honouring Retry-After; returns False if it should be spooled."""
+        if self._session is None:
+            # Imported here so startup never waits on requests/urllib3
+            import requests
+            self._session = requests.Session()
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                resp = self._session.post(self.webhook_url, json={"content": message}, timeout=DEFAULT_TIMEOUT)
+            except Exception as e:
+                self.logger.warning(f"Discord webhook error: {e}")
+                time.sleep(min(2 ** attempt, MAX_RETRY_AFTER))
+                continue
+            if resp.status_code == 429:
+                retry_after = _retry_after_seconds(resp)
+                self.logger.warning(f"Discord rate limited; retrying in {retry_after:.1f}s")
+                time.sleep(retry_after)
+                continue
+            if resp.status_code >= 500:
+                self.logger.warning(f"Discord webhook failed: {resp.status_code} {resp.text}")
+                time.sleep(min(2 ** attempt, MAX_RETRY_AFTER))
+                continue
+            if resp.status_code >= 400:
+                # Bad or deleted webhook: retrying later would not help
+                self.logger.warning(f"Discord webhook failed: {resp.status_code} {resp.text}")
+                return True
+            return True
+        return False
+
+    def _spool(self, message):
+        """Append an undelivered message to the outbox for replay on next start."""
+        try:
+            with open(self.outbox_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'content': message, 'queued_at': time.time()}) + '\n')
+        except OSError as e:
+            self.logger.warning(f"Failed to spool Discord message: {e}")
+
+    def _replay_outbox(self):
+        if not os.path.exists(self.outbox_path):
+            return
+        replay_path = f"{self.outbox_path}.replay"
+        try:
+            os.replace(self.outbox_path, replay_path)
+            with open(replay_path, 'r', encoding='utf-8') as f:
+                messages = [json.loads(line)['content'] for line in f if line.strip()]
+            os.remove(replay_path)
+        except Exception as e:
+            self.logger.warning(f"Failed to read Discord outbox: {e}")
+            return
+        if not messages:
+            return
+        self.logger.info(f"Replaying {len(messages)} undelivered Discord message(s).")
+        self._ensure_worker()
+        for message in messages:
+            try:
+                self._queue.put_nowait(message)
+            except queue.Full:
+                self._spool(message)
+
     def _send(self, content):
+        """Queue a message for delivery; returns False if disabled or the queue is full."""
         if not self.enabled or not self.webhook_url:
             return False
         message = content
         if self.profile_name:
             message = f"[{self.profile_name}] {content}"
+        self._ensure_worker()
         try:
-            resp = requests.post(self.webhook_url, json={"content": message}, timeout=DEFAULT_TIMEOUT)
-            if resp.status_code >= 400:
-                self.logger.warning(f"Discord webhook failed: {resp.status_code} {resp.text}")
-                return False
+            self._queue.put_nowait(message)
             return True
-        except Exception as e:
-            self.logger.warning(f"Discord webhook error: {e}")
+        except queue.Full:
+            self.logger.warning("Discord queue full; spooling message to outbox.")
+            self._spool(message)
             return False
 
+    def flush(self, timeout=DEFAULT_FLUSH_TIMEOUT):
+        """Wait up to ``timeout`` seconds for queued messages; returns True if all were sent."""
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=DEFAULT_FLUSH_TIMEOUT):
+        """Flush with a deadline, spool whatever is left, then stop the worker."""
+        return self._stop(self.flush(timeout))
+
+    def _stop(self, flushed):
+        """Spool the queue and the in-flight batch unless ``flushed``, then stop the worker."""
+        if not flushed:
+            self.logger.warning("Discord queue not drained before shutdown deadline; spooling the rest.")
+            # The batch being posted right now would die with the daemon worker; the post in
+            # progress may still land, so it can be sent twice after the next start
+            with self._in_flight_lock:
+                self._abandoned = True
+                in_flight, self._in_flight = self._in_flight, []
+            for message in in_flight:
+                self._spool(message)
+            while True:
+                try:
+                    message = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if message is not None:
+                    self._spool(message)
+                self._queue.task_done()
+        if self._worker is not None and self._worker.is_alive():
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                pass
+        if flushed and self._session is not None:
+            self._session.close()
+        return flushed
+
     def notify_bot_started(self, version_label=None):
         suffix = f" ({version_label})" if version_label else ""
         return self._send(f"🚀 Bot started{suffix}")
@@ -68,3 +272,26 @@ class DiscordBroadcaster:
             except Exception:
                 pass
         return self._send(f"✅ Attendance marked: {event_name}{when}")
+
+
+def close_all(broadcasters, timeout=DEFAULT_FLUSH_TIMEOUT):
+    """Close several broadcasters under one shared deadline.
+
+    Every worker keeps posting while we wait, so all queues drain concurrently
+    and shutdown is bounded by ``timeout`` in total, not per profile. Only once
+    the deadline has passed for all of them is anything left over spooled.
+    """
+    broadcasters = list(broadcasters)
+    deadline = time.monotonic() + timeout
+    flushed = []
+    for broadcaster in broadcasters:
+        try:
+            flushed.append(broadcaster.flush(max(deadline - time.monotonic(), 0)))
+        except Exception as e:
+            broadcaster.logger.warning(f"Failed to flush Discord broadcaster: {e}")
+            flushed.append(False)
+    for broadcaster, done in zip(broadcasters, flushed):
+        try:
+            broadcaster._stop(done)
+        except Exception as e:
+            broadcaster.logger.warning(f"Failed to close Discord broadcaster: {e}")
@@ -0,0 +1,176 @@
+import logging
+import threading
+import time
+
+from driver_session import ManagedDriver
+
+DEFAULT_MAX_DRIVERS = 2
+ADMISSION_RETRY_SECONDS = 15
+
+
+class _PooledSession:
+    """ManagedDriver-shaped view of one profile's slot in a DriverPool."""
+
+    def __init__(self, pool, key):
+        self.pool = pool
+        self.key = key
+
+    def acquire(self, blocking=True):
+        return self.pool.acquire(self.key, blocking=blocking)
+
+    def release(self, discard=False):
+        self.pool.release(self.key, discard=discard)
+
+
+class DriverPool:
+    """At most ``max_drivers`` Chromes alive at once, one warm ManagedDriver per profile.
+
+    When the cap is reached, the least recently used idle Chrome is closed to
+    make room; if every live Chrome is busy, ``acquire`` waits for one to free up.
+    Non-blocking callers (the keepalive) never close another profile's Chrome.
+    ``factory(key)`` builds a driver for the profile identified by ``key``.
+    ``admit()``, if given, is asked before each new launch (e.g. a memory budget);
+    while it refuses, idle Chromes are closed first and then the launch waits.
+    ``on_quit(driver)`` runs after every driver is quit.
+    """
+
+    def __init__(self, factory, max_drivers=DEFAULT_MAX_DRIVERS, logger=None, admit=None, on_quit=None):
+        self.factory = factory
+        self.max_drivers = max_drivers
+        self.admit = admit
+        self.on_quit = on_quit
+        self.logger = logger or logging.getLogger("attendance_bot")
+        self._cond = threading.Condition()
+        self._sessions = {}
+        self._open = {}
+        self._busy = set()
+        # Evicted sessions still quitting; they count against the cap until gone
+        self._closing = set()
+
+    def _session(self, key):
+        session = self._sessions.get(key)
+        if session is None:
+            session = ManagedDriver(lambda: self.factory(key), logger=self.logger, on_quit=self.on_quit)
+            self._sessions[key] = session
+        return session
+
+    def _take_idle(self):
+        """Mark the least recently used idle Chrome as closing; returns its key, or None if all are busy."""
+        idle = [k for k in self._open if k not in self._busy]
+        if not idle:
+            return None
+        victim = min(idle, key=self._open.get)
+        del self._open[victim]
+        self._closing.add(victim)
+        return victim
+
+    def _close(self, victim):
+        """Quit an evicted Chrome; called without the lock, as quit() can take seconds."""
+        self.logger.info(f"Browser pool full; closing idle Chrome for {victim or 'default profile'}.")
+        try:
+            self._sessions[victim].shutdown()
+        finally:
+            with self._cond:
+                self._closing.discard(victim)
+                self._cond.notify_all()
+
+    def acquire(self, key, blocking=True):
+        """Return a driver for ``key`` (None if Chrome fails to start, or if busy and not blocking)."""
+        admitted = None
+        while True:
+            victim = None
+            check_admission = False
+            last_admitted, admitted = admitted, None
+            with self._cond:
+                if key not in self._busy and key not in self._closing:
+                    room = len(self._open) + len(self._closing) < self.max_drivers
+                    if key in self._open or (room and (self.admit is None or last_admitted)):
+                        self._busy.add(key)
+                        self._open[key] = time.monotonic()
+                        session = self._session(key)
+                        break
+                    if room and last_admitted is None:
+                        check_admission = True
+                    # Only a caller that would otherwise wait may close someone else's warm Chrome
+                    elif blocking:
+                        victim = self._take_idle()
+                if not check_admission and victim is None:
+                    if not blocking:
+                        return None
+                    # Timed wait: memory can free up without anyone releasing a driver here
+                    self._cond.wait(timeout=ADMISSION_RETRY_SECONDS)
+                    continue
+            if check_admission:
+                # admit() may measure memory across many processes; other acquires and releases go on meanwhile
+                admitted = bool(self.admit())
+                continue
+            self._close(victim)
+        driver = None
+        try:
+            driver = session.acquire()
+        finally:
+            if driver is None:
+                with self._cond:
+                    self._busy.discard(key)
+                    self._open.pop(key, None)
+                    self._cond.notify_all()
+        return driver
+
+    def release(self, key, discard=False):
+        with self._cond:
+            session = self._sessions[key]
+        session.release(discard=discard)
+        with self._cond:
+            self._busy.discard(key)
+            if discard:
+                self._open.pop(key, None)
+            else:
+                self._open[key] = time.monotonic()
+            self._cond.notify_all()
+
+    def session(self, key):
+        return _PooledSession(self, key)
+
+    def reap_idle(self):
+        with self._cond:
+            idle = [(k, self._sessions[k]) for k in self._open if k not in self._busy]
+        for key, session in idle:
+            session.reap_idle()
+            if not session.is_open():
+                with self._cond:
+                    if key not in self._busy:
+                        self._open.pop(key, None)
+                        self._cond.notify_all()
+
+    def is_open(self, key):
+        """True while ``key`` has a Chrome running or a job holding its slot."""
+        with self._cond:
+            return key in self._open or key in self._busy or key in self._closing
+
+    def run_closed(self, key, func):
+        """Run ``func()`` while ``key`` has no Chrome, holding off launches for it.
+
+        Returns func's result, or None without calling it if a Chrome is open or busy.
+        """
+        with self._cond:
+            session = self._sessions.get(key)
+            if key in self._open or key in self._busy or key in self._closing or (session is not None and session.is_open()):
+                return None
+            self._busy.add(key)
+        try:
+            return func()
+        finally:
+            with self._cond:
+                self._busy.discard(key)
+                self._cond.notify_all()
+
+    def live_count(self):
+        with self._cond:
+            return len(self._open)
+
+    def shutdown(self):
+        with self._cond:
+            sessions = list(self._sessions.values())
+            self._open.clear()
+        for session in sessions:
+            session.shutdown()
@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import threading
+
+CACHE_FILE = 'chromedriver_cache.json'
+VERSION_TIMEOUT = 5
+
+logger = logging.getLogger("attendance_bot")
+
+_lock = threading.Lock()
+# Driver path resolved in this process; reused without re-reading the Chrome version
+_resolved_path = None
+# Set after a driver failed to start: the next resolve must not trust an unversioned cache
+_revalidate = False
+
+_CHROME_COMMANDS = {
+    'darwin': [
+        ['/Applications/Google Chrome.app/Contents/MacOS/Google Chrome', '--version'],
+        ['/Applications/Chromium.app/Contents/MacOS/Chromium', '--version'],
+    ],
+    'linux': [
+        ['google-chrome', '--version'],
+        ['google-chrome-stable', '--version'],
+        ['chromium', '--version'],
+        ['chromium-browser', '--version'],
+    ],
+}
+
+
+def _cache_path():
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), CACHE_FILE)
+
+
+def _windows_chrome_version():
+    import winreg
+    for root in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+        try:
+            with winreg.OpenKey(root, r'Software\Google\Chrome\BLBeacon') as key:
+                return winreg.QueryValueEx(key, 'version')[0]
+        except OSError:
+            continue
+    return None
+
+
+def get_chrome_version():
+    """Return the installed Chrome version string without touching the network, or None."""
+    if sys.platform.startswith('win'):
+        try:
+            return _windows_chrome_version()
+        except Exception:
+            return None
+    platform_key = 'darwin' if sys.platform == 'darwin' else 'linux'
+    for cmd in _CHROME_COMMANDS[platform_key]:
+        try:
+            output = subprocess.check_output(cmd, stderr=subprocess.DEVNULL, timeout=VERSION_TIMEOUT).decode()
+        except Exception:
+            continue
+        match = re.search(r'(\d+\.\d+\.\d+\.\d+)', output)
+        if match:
+            return match.group(1)
+    return None
+
+
+def _load_cache():
+    try:
+        with open(_cache_path(), 'r') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _save_cache(chrome_version, driver_path):
+    try:
+        with open(_cache_path(), 'w') as f:
+            json.dump({'chrome_version': chrome_version, 'driver_path': driver_path}, f)
+    except OSError as e:
+        logger.warning(f"Failed to save chromedriver cache: {e}")
+
+
+def invalidate_chromedriver():
+    """Forget the resolved driver after it failed to start, so the next launch checks Chrome again."""
+    global _resolved_path, _revalidate
+    with _lock:
+        _resolved_path = None
+        _revalidate = True
+
+
+def resolve_chromedriver():
+    """Return a chromedriver path for the installed Chrome, resolving online only when Chrome changed.
+
+    The first call per process reads the Chrome version; later calls reuse its
+    answer until invalidate_chromedriver(). If the version cannot be read, the
+    cached driver is reused as-is and only re-resolved after it fails to start.
+    Falls back to the last known driver if the download host is unreachable, and
+    to None (letting Selenium locate a driver itself) if nothing is cached.
+    """
+    global _resolved_path, _revalidate
+    with _lock:
+        if _resolved_path and os.path.exists(_resolved_path):
+            return _resolved_path
+
+        chrome_version = get_chrome_version()
+        cache = _load_cache()
+        cached_path = cache.get('driver_path')
+        cached_ok = bool(cached_path) and os.path.exists(cached_path)
+        if cached_ok and (
+            (chrome_version and cache.get('chrome_version') == chrome_version)
+            or (chrome_version is None and not _revalidate)
+        ):
+            _resolved_path = cached_path
+            return cached_path
+
+        try:
+            from webdriver_manager.chrome import ChromeDriverManager
+            driver_path = ChromeDriverManager().install()
+        except Exception as e:
+            if cached_ok:
+                logger.warning(f"chromedriver lookup failed ({e}); reusing cached driver {cached_path}.")
+                _resolved_path = cached_path
+                return cached_path
+            logger.warning(f"chromedriver lookup failed ({e}); letting Selenium locate a driver.")
+            return None
+
+        _save_cache(chrome_version, driver_path)
+        _resolved_path = driver_path
+        _revalidate = False
+        return driver_path
+
+
+def chrome_service():
+    """Build a selenium Service for the resolved chromedriver."""
+    from selenium.webdriver.chrome.service import Service
+    driver_path = resolve_chromedriver()
+    return Service(driver_path) if driver_path else Service()
+
+
+def start_chrome(options):
+    """Launch Chrome with ``options`` on the resolved chromedriver.
+
+    If the launch itself fails the cached driver may be stale after a Chrome
+    update, so it is invalidated and the next launch re-resolves it.
+    """
+    from selenium import webdriver
+    service = chrome_service()
+    try:
+        return webdriver.Chrome(service=service, options=options)
+    except Exception:
+        invalidate_chromedriver()
+        raise
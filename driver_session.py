@@ -0,0 +1,101 @@
+import logging
+import threading
+import time
+
+DEFAULT_MAX_USES = 20
+DEFAULT_MAX_IDLE_SECONDS = 2 * 60 * 60
+
+
+class ManagedDriver:
+    """Keep one WebDriver warm between events, recycling it when stale or broken."""
+
+    def __init__(self, factory, max_uses=DEFAULT_MAX_USES, max_idle_seconds=DEFAULT_MAX_IDLE_SECONDS, logger=None, on_quit=None):
+        self.factory = factory
+        self.on_quit = on_quit
+        self.max_uses = max_uses
+        self.max_idle_seconds = max_idle_seconds
+        self.logger = logger or logging.getLogger("attendance_bot")
+        self._lock = threading.RLock()
+        self._driver = None
+        self._uses = 0
+        self._last_used = 0.0
+
+    def _is_alive(self):
+        try:
+            self._driver.execute_script("return 1;")
+            return True
+        except Exception:
+            return False
+
+    def _quit(self):
+        driver, self._driver = self._driver, None
+        self._uses = 0
+        if driver is None:
+            return
+        try:
+            driver.quit()
+        except Exception as e:
+            self.logger.warning(f"Failed to quit WebDriver cleanly: {e}")
+        if self.on_quit is not None:
+            self.on_quit(driver)
+
+    def _needs_recycle(self):
+        if self._uses >= self.max_uses:
+            self.logger.info(f"Recycling WebDriver after {self._uses} uses.")
+            return True
+        if time.monotonic() - self._last_used > self.max_idle_seconds:
+            self.logger.info("Recycling idle WebDriver.")
+            return True
+        if not self._is_alive():
+            self.logger.warning("WebDriver failed health check; rebuilding.")
+            return True
+        return False
+
+    def acquire(self, blocking=True):
+        """Lock the session and return a healthy driver, or None if Chrome cannot start.
+
+        With blocking=False, also returns None straight away if someone else holds it.
+        """
+        if not self._lock.acquire(blocking=blocking):
+            return None
+        try:
+            if self._driver is not None and self._needs_recycle():
+                self._quit()
+            if self._driver is None:
+                self._driver = self.factory()
+                self._uses = 0
+            if self._driver is None:
+                self._lock.release()
+            return self._driver
+        except Exception:
+            self._lock.release()
+            raise
+
+    def release(self, discard=False):
+        """Return the driver to the session; pass discard=True to drop a broken one."""
+        try:
+            self._uses += 1
+            self._last_used = time.monotonic()
+            if discard:
+                self._quit()
+        finally:
+            self._lock.release()
+
+    def reap_idle(self):
+        """Quit the driver if it has sat idle past the limit and nobody holds it."""
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if self._driver is not None and time.monotonic() - self._last_used > self.max_idle_seconds:
+                self.logger.info("Closing idle WebDriver.")
+                self._quit()
+        finally:
+            self._lock.release()
+
+    def is_open(self):
+        """True while a Chrome is running for this session."""
+        return self._driver is not None
+
+    def shutdown(self):
+        with self._lock:
+            self._quit()
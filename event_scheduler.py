@@ -0,0 +1,87 @@
+import heapq
+import itertools
+import threading
+
+
+class EventScheduler:
+    """Thread-safe min-heap of (start, name, trigger, end, profile) events keyed on trigger time.
+
+    A dict index keyed on (start, name, profile) gives O(1) lookup; cancelled
+    entries stay in the heap and are skipped lazily when they reach the top.
+    ``profile`` is None when only one profile is running.
+    """
+
+    def __init__(self, events=()):
+        self._lock = threading.RLock()
+        self._heap = []
+        self._index = {}
+        self._counter = itertools.count()
+        for event in events:
+            self.add(*event)
+
+    def add(self, event_start, event_name, trigger_time, event_end, profile=None):
+        """Insert an event, replacing any existing one with the same (start, name, profile)."""
+        key = (event_start, event_name, profile)
+        with self._lock:
+            entry = [trigger_time, next(self._counter), key, (event_start, event_name, trigger_time, event_end, profile)]
+            self._index[key] = entry
+            heapq.heappush(self._heap, entry)
+            if len(self._heap) > 2 * len(self._index) + 64:
+                # Too many cancelled leftovers: rebuild from the live index
+                self._heap = list(self._index.values())
+                heapq.heapify(self._heap)
+
+    def _prune(self):
+        while self._heap and self._index.get(self._heap[0][2]) is not self._heap[0]:
+            heapq.heappop(self._heap)
+
+    def peek(self):
+        """Return the next event without removing it, or None."""
+        with self._lock:
+            self._prune()
+            return self._heap[0][3] if self._heap else None
+
+    def next(self, now=None):
+        """Pop the next event; when now is given, only if its trigger time has passed."""
+        with self._lock:
+            self._prune()
+            if not self._heap:
+                return None
+            if now is not None and self._heap[0][0] > now:
+                return None
+            entry = heapq.heappop(self._heap)
+            del self._index[entry[2]]
+            return entry[3]
+
+    def get(self, event_start, event_name, profile=None):
+        with self._lock:
+            entry = self._index.get((event_start, event_name, profile))
+            return entry[3] if entry else None
+
+    def cancel(self, event_start, event_name, profile=None):
+        """Drop an event; returns False if it was not scheduled."""
+        with self._lock:
+            return self._index.pop((event_start, event_name, profile), None) is not None
+
+    def reschedule(self, event_start, event_name, trigger_time, event_end=None, profile=None):
+        """Move an event to a new trigger time; returns False if it was not scheduled."""
+        with self._lock:
+            entry = self._index.get((event_start, event_name, profile))
+            if entry is None:
+                return False
+            if event_end is None:
+                event_end = entry[3][3]
+            self.add(event_start, event_name, trigger_time, event_end, profile)
+            return True
+
+    def snapshot(self):
+        """Return the live events ordered by trigger time."""
+        with self._lock:
+            return [entry[3] for entry in sorted(self._index.values())]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._index)
+
+    def __bool__(self):
+        return len(self) > 0
@@ -1,16 +1,17 @@
 import os
 import json
 import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from driver_resolver import start_chrome
 
 CREDENTIALS_FILE = 'credentials.json'
+ICAL_SOURCE_FILE = 'ical_source.json'
 TIMETABLE_URL = 'https://webtimetables.royalholloway.ac.uk/'
+ICS_FILENAME = 'student_timetable.ics'
+DOWNLOAD_TIMEOUT = 30
 
 
 def load_credentials():
@@ -19,20 +20,90 @@ def load_credentials():
     with open(CREDENTIALS_FILE, 'r') as f:
         return json.load(f)
 
+def load_ical_source():
+    if not os.path.exists(ICAL_SOURCE_FILE):
+        return None
+    try:
+        with open(ICAL_SOURCE_FILE, 'r') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def save_ical_source(url, etag=None, last_modified=None):
+    with open(ICAL_SOURCE_FILE, 'w') as f:
+        json.dump({'url': url, 'etag': etag, 'last_modified': last_modified}, f)
+
+
+def download_ics(ical_url, etag=None, last_modified=None):
+    """Conditional GET of the iCal feed; returns (changed, etag, last_modified).
+
+    The body is streamed to a temp file and renamed into place, so readers never
+    see a partial timetable and a 304 leaves the existing file untouched.
+    """
+    import requests
+    # Campus site has broken/unknown cert; disable verification for this download.
+    requests.packages.urllib3.disable_warnings()  # suppress InsecureRequestWarning
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    ics_folder = os.path.join(os.getcwd(), 'ics')
+    ics_path = os.path.join(ics_folder, ICS_FILENAME)
+    if not os.path.exists(ics_path):
+        headers = {}
+    with requests.get(ical_url, headers=headers, verify=False, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+        if response.status_code == 304:
+            print('.ics file not modified since last download.')
+            return False, etag, last_modified
+        response.raise_for_status()
+        os.makedirs(ics_folder, exist_ok=True)
+        tmp_path = f"{ics_path}.part"
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=1 << 16):
+                    f.write(chunk)
+            with open(tmp_path, 'rb') as f:
+                # An expired feed URL answers 200 with an HTML page; never let that replace the timetable
+                if b'BEGIN:VCALENDAR' not in f.read(256):
+                    raise RuntimeError('iCal URL did not return a calendar')
+            os.replace(tmp_path, ics_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        print(f'.ics file saved to {ics_path}')
+        return True, response.headers.get('ETag'), response.headers.get('Last-Modified')
+
+
+def refresh_ics(driver=None):
+    """Refresh the timetable over plain HTTP, falling back to the browser flow."""
+    source = load_ical_source()
+    if source and source.get('url'):
+        try:
+            changed, etag, last_modified = download_ics(source['url'], source.get('etag'), source.get('last_modified'))
+            save_ical_source(source['url'], etag, last_modified)
+            return changed
+        except Exception as e:
+            print(f'Cached iCal URL failed ({e}); rediscovering via browser...')
+    return fetch_ics_url(driver=driver)
+
+
 def start_driver():
     options = Options()
     options.add_argument('--no-sandbox')
     options.add_argument('--disable-dev-shm-usage')
     options.add_experimental_option('excludeSwitches', ['enable-logging'])
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
-    return driver
+    return start_chrome(options)
 
-def fetch_ics_url():
+def fetch_ics_url(driver=None):
+    """Scrape the iCal URL through the timetable site; reuses ``driver`` if given and leaves it open."""
+    owns_driver = driver is None
     creds = load_credentials()
     username = creds['username'].split('@')[0]
     password = creds['password']
-    driver = start_driver()
+    if owns_driver:
+        driver = start_driver()
     driver.get(TIMETABLE_URL)
     try:
         # Login
@@ -72,27 +143,18 @@ def fetch_ics_url():
                 break
         if ical_url:
             print(f'iCal URL: {ical_url}')
-            # Download the .ics file
-            import requests
-            # Campus site has broken/unknown cert; disable verification for this download.
-            requests.packages.urllib3.disable_warnings()  # suppress InsecureRequestWarning
-            response = requests.get(ical_url, verify=False)
-            if response.status_code == 200:
-                ics_folder = os.path.join(os.getcwd(), 'ics')
-                os.makedirs(ics_folder, exist_ok=True)
-                ics_path = os.path.join(ics_folder, 'student_timetable.ics')
-                with open(ics_path, 'wb') as f:
-                    f.write(response.content)
-                print(f'.ics file saved to {ics_path}')
-            else:
-                print(f'Failed to download .ics file. Status code: {response.status_code}')
+            # Download the .ics file and remember the URL for HTTP-only refreshes
+            _, etag, last_modified = download_ics(ical_url)
+            save_ical_source(ical_url, etag, last_modified)
+            return True
         else:
             print('Could not find iCal URL on the page.')
     except Exception as e:
         print(f'Error during timetable automation: {e}')
     finally:
-        time.sleep(5)
-        driver.quit()
+        if owns_driver:
+            driver.quit()
+    return False
 
 if __name__ == '__main__':
-    fetch_ics_url()
+    refresh_ics()
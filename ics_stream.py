@@ -0,0 +1,138 @@
+import logging
+import re
+import time
+import zoneinfo  # For Python 3.9 and above
+from datetime import datetime, timedelta, timezone
+
+EXCLUDED_NAMES = ('Optional Attendance',)
+# The timetable and the rest of the bot assume UK time
+FALLBACK_TZID = 'Europe/London'
+_DURATION_RE = re.compile(r'^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+
+logger = logging.getLogger("attendance_bot")
+_warned_tzids = set()
+
+
+def _unfolded_lines(f):
+    """Yield logical iCalendar lines, joining RFC 5545 folded continuations."""
+    current = None
+    for raw in f:
+        line = raw.rstrip('\r\n')
+        if line[:1] in (' ', '\t'):
+            if current is not None:
+                current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def _split_property(line):
+    head, _, value = line.partition(':')
+    name, *params = head.split(';')
+    param_map = {}
+    for param in params:
+        key, _, val = param.partition('=')
+        param_map[key.upper()] = val.strip('"')
+    return name.upper(), param_map, value
+
+
+def _parse_datetime(value, params):
+    """Return a UTC epoch for a DTSTART/DTEND value."""
+    value = value.strip()
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        dt = datetime.strptime(value[:8], '%Y%m%d')
+        return dt.astimezone(timezone.utc).timestamp()
+    if value.endswith('Z'):
+        dt = datetime.strptime(value[:-1], '%Y%m%dT%H%M%S').replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+    dt = datetime.strptime(value, '%Y%m%dT%H%M%S')
+    tzid = params.get('TZID')
+    if tzid:
+        try:
+            return dt.replace(tzinfo=zoneinfo.ZoneInfo(tzid)).timestamp()
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            if tzid not in _warned_tzids:
+                _warned_tzids.add(tzid)
+                logger.warning(f"Unknown TZID '{tzid}' in timetable; reading its times as {FALLBACK_TZID}.")
+            return dt.replace(tzinfo=zoneinfo.ZoneInfo(FALLBACK_TZID)).timestamp()
+    # Floating time: interpret in the machine's local zone
+    return dt.astimezone(timezone.utc).timestamp()
+
+
+def _parse_duration(value):
+    match = _DURATION_RE.match(value.strip())
+    if not match:
+        raise ValueError(f"Unsupported DURATION: {value}")
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    delta = timedelta(
+        weeks=int(weeks or 0), days=int(days or 0),
+        hours=int(hours or 0), minutes=int(minutes or 0), seconds=int(seconds or 0),
+    )
+    return -delta.total_seconds() if sign == '-' else delta.total_seconds()
+
+
+def _unescape(text):
+    return (text.replace('\\n', '\n').replace('\\N', '\n')
+            .replace('\\,', ',').replace('\\;', ';').replace('\\\\', '\\'))
+
+
+def iter_events(file_path, now=None, excluded_names=EXCLUDED_NAMES):
+    """Yield (start_epoch, end_epoch, name) for future VEVENTs, in file order.
+
+    The file is read line by line and only the DTSTART/DTEND/DURATION/SUMMARY
+    lines of the current VEVENT are kept; excluded events are dropped before any
+    date is parsed, past ones once DTSTART is. Callers that list() the result
+    still hold every future event.
+    """
+    now = time.time() if now is None else now
+    with open(file_path, 'r', encoding='utf-8') as f:
+        props = None
+        depth = 0
+        for line in _unfolded_lines(f):
+            upper = line.upper()
+            if upper == 'BEGIN:VEVENT':
+                props, depth = {}, 0
+                continue
+            if props is None:
+                continue
+            if upper.startswith('BEGIN:'):
+                # Nested component (e.g. VALARM); its properties are not the event's
+                depth += 1
+                continue
+            if upper.startswith('END:') and depth:
+                depth -= 1
+                continue
+            if upper == 'END:VEVENT':
+                record = _build_record(props, now, excluded_names)
+                props = None
+                if record:
+                    yield record
+                continue
+            if depth:
+                continue
+            key = line.split(':', 1)[0].split(';', 1)[0].upper()
+            if key in ('DTSTART', 'DTEND', 'DURATION', 'SUMMARY'):
+                props[key] = line
+
+
+def _build_record(props, now, excluded_names):
+    if 'DTSTART' not in props:
+        return None
+    name = _unescape(_split_property(props['SUMMARY'])[2]) if 'SUMMARY' in props else ''
+    if any(excluded in name for excluded in excluded_names):
+        return None
+    _, params, value = _split_property(props['DTSTART'])
+    start = _parse_datetime(value, params)
+    if start <= now:
+        return None
+    if 'DTEND' in props:
+        _, params, value = _split_property(props['DTEND'])
+        end = _parse_datetime(value, params)
+    elif 'DURATION' in props:
+        end = start + _parse_duration(_split_property(props['DURATION'])[2])
+    else:
+        end = start
+    return start, end, name
@@ -0,0 +1,75 @@
+import re
+import subprocess
+import sys
+
+# Modules the bot defers until the subsystem that needs them runs
+HEAVY_MODULES = [
+    'rich.live',
+    'rich.table',
+    'rich.panel',
+    'selenium.webdriver',
+    'selenium.webdriver.support.ui',
+    'webdriver_manager.chrome',
+    'pynput.keyboard',
+    'ics',
+    'ntplib',
+    'requests',
+    'pyotp',
+]
+
+_LINE_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+# Printed on stdout by the child for each module that fails to import
+_FAILED_MARKER = 'IMPORT-FAILED '
+
+
+def profile_imports(modules=HEAVY_MODULES):
+    """Import each module in a fresh interpreter under -X importtime.
+
+    Returns (per_module, top_self, failed): the cumulative cost in microseconds
+    each requested module added on top of the ones before it, the ten
+    individual modules with the largest self time, and the requested modules
+    that failed to import. -X importtime still reports a failed import (as a
+    cheap one), so every module under a failed package is left out of the figures.
+    """
+    code = "\n".join(
+        f"try:\n    import {name}\nexcept Exception:\n    print({_FAILED_MARKER + name!r})" for name in modules
+    )
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True)
+    failed = [line[len(_FAILED_MARKER):] for line in proc.stdout.splitlines() if line.startswith(_FAILED_MARKER)]
+    failed_roots = {name.split('.')[0] for name in failed}
+    per_module = {}
+    self_times = []
+    for line in proc.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = int(match.group(1)), int(match.group(2)), match.group(3), match.group(4)
+        if name.split('.')[0] in failed_roots:
+            continue
+        self_times.append((self_us, name))
+        if len(indent) <= 1 and name.split('.')[0] in {m.split('.')[0] for m in modules}:
+            root = name.split('.')[0]
+            per_module[root] = per_module.get(root, 0) + cumulative_us
+    self_times.sort(reverse=True)
+    return per_module, self_times[:10], failed
+
+
+def print_report(modules=HEAVY_MODULES):
+    per_module, top_self, failed = profile_imports(modules)
+    total = sum(per_module.values())
+    print(f"{'Package':<20} {'Cumulative':>12}")
+    for name, us in sorted(per_module.items(), key=lambda item: item[1], reverse=True):
+        print(f"{name:<20} {us / 1000:>10.1f}ms")
+    print(f"{'total':<20} {total / 1000:>10.1f}ms")
+    print()
+    print("Slowest single modules (self time)")
+    for us, name in top_self:
+        print(f"  {name:<48} {us / 1000:>8.1f}ms")
+    if failed:
+        print()
+        print(f"Not installed (excluded): {', '.join(failed)}")
+    failed_roots = {name.split('.')[0] for name in failed}
+    preloaded = [m for m in modules if m.split('.')[0] not in per_module and m.split('.')[0] not in failed_roots]
+    if preloaded:
+        print()
+        print(f"Already loaded by the interpreter: {', '.join(preloaded)}")
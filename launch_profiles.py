@@ -0,0 +1,102 @@
+import logging
+
+FAST = 'fast'
+LEGACY = 'legacy'
+LAUNCH_PROFILES = (FAST, LEGACY)
+DEFAULT_LAUNCH_PROFILE = FAST
+
+# The switches every launch has always used; LEGACY is exactly this, kept for comparison
+_BASE_ARGUMENTS = (
+    "--headless=new",
+    "--log-level=3",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+)
+# Nothing the bot drives needs these, and each one is a process, a timer or a network round-trip
+_FAST_ARGUMENTS = (
+    "--disable-extensions",
+    "--disable-gpu",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--no-first-run",
+    "--mute-audio",
+)
+
+_IMAGE_EXTENSIONS = ('png', 'jpg', 'jpeg', 'gif', 'webp', 'svg', 'ico', 'bmp')
+_MEDIA_EXTENSIONS = ('mp4', 'webm', 'mp3', 'ogg', 'wav', 'm4a')
+_FONT_EXTENSIONS = ('woff', 'woff2', 'ttf', 'otf', 'eot')
+
+# Hosts whose images, media and fonts are blocked: the Banner pages themselves
+ASSET_BLOCK_HOSTS = ('*.royalholloway.ac.uk',)
+# Hosts blocked outright: analytics, tag managers, telemetry and third-party fonts
+TRACKER_HOSTS = (
+    '*.google-analytics.com',
+    '*.googletagmanager.com',
+    '*.doubleclick.net',
+    '*.clarity.ms',
+    '*.hotjar.com',
+    '*.events.data.microsoft.com',
+    'fonts.googleapis.com',
+    'fonts.gstatic.com',
+)
+# Never blocked: the Microsoft sign-in pages and their CDNs. The MFA picker is
+# matched by its picker_verify_code image, and the login scripts live here.
+LOGIN_ALLOW_HOSTS = (
+    'login.microsoftonline.com',
+    'login.live.com',
+    'aadcdn.msauth.net',
+    'aadcdn.msftauth.net',
+    'logincdn.msauth.net',
+    'mysignins.microsoft.com',
+)
+
+
+def chrome_arguments(launch_profile=DEFAULT_LAUNCH_PROFILE):
+    """Command-line switches for ``launch_profile`` (user-data-dir is added by the caller)."""
+    if launch_profile == LEGACY:
+        return list(_BASE_ARGUMENTS)
+    return list(_BASE_ARGUMENTS) + list(_FAST_ARGUMENTS)
+
+
+def _host_allowed(host):
+    bare = host.lstrip('*.')
+    return any(bare == allowed or bare.endswith('.' + allowed) or allowed.endswith('.' + bare)
+               for allowed in LOGIN_ALLOW_HOSTS)
+
+
+def blocked_url_patterns():
+    """URL patterns for Network.setBlockedURLs.
+
+    setBlockedURLs has no exclusions, so the allowlist works by scoping every
+    pattern to a host: asset blocks only name the Banner hosts, and any host
+    overlapping LOGIN_ALLOW_HOSTS is dropped.
+    """
+    patterns = []
+    for host in ASSET_BLOCK_HOSTS:
+        if _host_allowed(host):
+            continue
+        for ext in _IMAGE_EXTENSIONS + _MEDIA_EXTENSIONS + _FONT_EXTENSIONS:
+            patterns.append(f"*://{host}/*.{ext}")
+            # Cache-busted URLs such as logo.png?v=3
+            patterns.append(f"*://{host}/*.{ext}?*")
+    for host in TRACKER_HOSTS:
+        if not _host_allowed(host):
+            patterns.append(f"*://{host}/*")
+    return patterns
+
+
+def apply_launch_profile(driver, launch_profile=DEFAULT_LAUNCH_PROFILE, logger=None):
+    """Turn on request blocking for a freshly started driver; a no-op for LEGACY.
+
+    Blocking is an optimisation only: if the CDP call fails the driver is still used.
+    """
+    if launch_profile == LEGACY:
+        return
+    logger = logger or logging.getLogger("attendance_bot")
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked_url_patterns()})
+    except Exception as e:
+        logger.warning(f"Could not enable request blocking: {e}")
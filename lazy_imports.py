@@ -0,0 +1,40 @@
+import importlib
+import threading
+
+
+class LazyImport:
+    """Stand-in for a module or module attribute that imports it on first use.
+
+    ``By = LazyImport('selenium.webdriver.common.by', 'By')`` behaves like the
+    real ``By`` once touched, but a run that never opens a browser never pays
+    for importing selenium.
+    """
+
+    def __init__(self, module_name, attr=None):
+        object.__setattr__(self, '_module_name', module_name)
+        object.__setattr__(self, '_attr', attr)
+        object.__setattr__(self, '_target', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def _load(self):
+        target = self._target
+        if target is None:
+            with self._lock:
+                target = self._target
+                if target is None:
+                    target = importlib.import_module(self._module_name)
+                    if self._attr:
+                        target = getattr(target, self._attr)
+                    object.__setattr__(self, '_target', target)
+        return target
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __repr__(self):
+        name = f"{self._module_name}.{self._attr}" if self._attr else self._module_name
+        state = 'loaded' if self._target is not None else 'not loaded'
+        return f"<LazyImport {name} ({state})>"
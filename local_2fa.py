@@ -11,16 +11,16 @@ def bind(secret: str):
         json.dump({'secret': secret}, f)
 
 
-def load_secret():
-    if not os.path.exists(CONFIG_FILE):
+def load_secret(config_file=CONFIG_FILE):
+    if not os.path.exists(config_file):
         return None
-    with open(CONFIG_FILE, 'r') as f:
+    with open(config_file, 'r') as f:
         return json.load(f).get('secret')
 
 
-def get_otp():
+def get_otp(config_file=CONFIG_FILE):
     """Return the current OTP for the bound secret."""
-    secret = load_secret()
+    secret = load_secret(config_file)
     if not secret:
         raise ValueError('No secret bound. Please bind first.')
     totp = pyotp.TOTP(secret)
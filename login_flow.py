@@ -0,0 +1,77 @@
+import logging
+import time
+
+from page_state import UNKNOWN, classify_page
+from waits import wait_until
+
+# Used when the caller has no event to bound the login by
+DEFAULT_LOGIN_BUDGET = 300
+# How long to wait for a blank/transitioning page to turn into a known state
+SETTLE_SECONDS = 10
+# A handler that keeps landing on the same state is not making progress
+MAX_VISITS_PER_STATE = 3
+
+logger = logging.getLogger("attendance_bot")
+
+
+class LoginStateMachine:
+    """Detect the login page state, run its handler, repeat until done or the deadline passes.
+
+    ``handlers`` maps page_state values to ``handler(driver, deadline)`` callables, which
+    must not wait past ``deadline``; ``is_done(driver)`` says when the login has finished.
+    ``deadline`` is an epoch timestamp (e.g. the event end) and bounds the whole run,
+    handlers included. ``timings`` holds one ``(state, seconds, ok)`` record per state visited.
+    """
+
+    def __init__(self, handlers, is_done, deadline=None, settle_seconds=SETTLE_SECONDS, max_visits=MAX_VISITS_PER_STATE):
+        self.handlers = handlers
+        self.is_done = is_done
+        self.deadline = deadline if deadline is not None else time.time() + DEFAULT_LOGIN_BUDGET
+        self.settle_seconds = settle_seconds
+        self.max_visits = max_visits
+        self.timings = []
+
+    def remaining(self):
+        return self.deadline - time.time()
+
+    def _settle(self, driver):
+        """Wait for the page to reach a known state or finish; returns the new state."""
+        def settled(d):
+            if self.is_done(d):
+                return 'done'
+            state = classify_page(d)
+            return state if state != UNKNOWN else None
+
+        budget = min(self.settle_seconds, max(self.remaining(), 0))
+        return wait_until(driver, settled, budget, poll_frequency=0.25) or UNKNOWN
+
+    def run(self, driver):
+        visits = {}
+        started = time.monotonic()
+        ok = False
+        try:
+            while self.remaining() > 0:
+                if self.is_done(driver):
+                    ok = True
+                    return True
+                state = classify_page(driver)
+                visits[state] = visits.get(state, 0) + 1
+                if visits[state] > self.max_visits:
+                    logger.error(f"Login stuck in state '{state}' after {self.max_visits} attempts.")
+                    return False
+                t0 = time.monotonic()
+                handler = self.handlers.get(state)
+                if handler is None:
+                    state_ok = self._settle(driver) != UNKNOWN
+                else:
+                    state_ok = bool(handler(driver, self.deadline))
+                self.timings.append((state, time.monotonic() - t0, state_ok))
+            logger.error("Login deadline reached before the session was established.")
+            return False
+        finally:
+            logger.info(f"Login {'succeeded' if ok else 'failed'} in {time.monotonic() - started:.1f}s: {self.format_timings()}")
+
+    def format_timings(self):
+        if not self.timings:
+            return "no login steps needed"
+        return ", ".join(f"{state} {seconds:.1f}s{'' if state_ok else ' (failed)'}" for state, seconds, state_ok in self.timings)
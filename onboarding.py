@@ -0,0 +1,31 @@
+import os
+
+from auto_login import first_time_setup, start_driver
+from fetch_ics import ICS_FILENAME, refresh_ics
+
+
+def run_onboarding():
+    """First-run setup in a single browser: MFA binding, timetable export and Chrome check.
+
+    Returns True when Chrome launched and is still responsive afterwards, so the
+    caller can skip its own Chrome health check.
+    """
+    try:
+        driver = start_driver()
+    except Exception as e:
+        print(f'Failed to start Chrome for onboarding: {e}')
+        return False
+    try:
+        first_time_setup(driver=driver)
+        if not refresh_ics(driver=driver) and not os.path.exists(os.path.join('ics', ICS_FILENAME)):
+            print('Timetable download did not complete; place the .ics file in the ics folder manually.')
+        driver.execute_script("return 1;")
+        return True
+    except Exception as e:
+        print(f'Error during onboarding: {e}')
+        return False
+    finally:
+        try:
+            driver.quit()
+        except Exception:
+            pass
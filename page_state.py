@@ -0,0 +1,54 @@
+BANNER_ATTENDANCE = 'banner_attendance'
+MS_USERNAME = 'ms_username'
+MS_PASSWORD = 'ms_password'
+MFA_PICKER = 'mfa_picker'
+OTP_ENTRY = 'otp_entry'
+KMSI = 'kmsi'
+UNKNOWN = 'unknown'
+
+LOGIN_STATES = (MS_USERNAME, MS_PASSWORD, MFA_PICKER, OTP_ENTRY, KMSI)
+MS_LOGIN_HOSTS = ('login.microsoftonline.com', 'mysignins.microsoft.com')
+BANNER_ATTENDANCE_PATH = '/BannerExtensibility/customPage/page/RHUL_Attendance_Student'
+
+# One round-trip: returns the URL plus which marker element is visible, in the
+# order the login flow meets them. Checks OTP entry before the picker because
+# the proofs list can stay in the DOM behind the code field.
+_CLASSIFY_SCRIPT = """
+function visible(sel) {
+    const el = document.querySelector(sel);
+    return !!el && el.getClientRects().length > 0 && window.getComputedStyle(el).visibility !== 'hidden';
+}
+let marker = null;
+if (visible("#pbid-blockFoundHappeningNowAttending, #pbid-buttonFoundHappeningNowButtonsOneHere, #pbid-buttonFoundHappeningNowButtonsTwoHere")) marker = 'banner';
+else if (visible("#KmsiCheckboxField, #KmsiDescription")) marker = 'kmsi';
+else if (visible("input[name='otc'], #idTxtBx_SAOTCC_OTC, input[data-testid='verification-entercode-input']")) marker = 'otp';
+else if (visible("#idDiv_SAOTCS_Proofs, #signInAnotherWay")) marker = 'picker';
+else if (visible("#i0118, input[name='passwd']")) marker = 'password';
+else if (visible("input[name='loginfmt'], #i0116")) marker = 'username';
+return [location.href, marker];
+"""
+
+_MARKER_STATES = {
+    'kmsi': KMSI,
+    'otp': OTP_ENTRY,
+    'picker': MFA_PICKER,
+    'password': MS_PASSWORD,
+    'username': MS_USERNAME,
+}
+
+
+def classify_page(driver):
+    """Identify the current page from its URL and one targeted script probe, without fetching page_source."""
+    try:
+        url, marker = driver.execute_script(_CLASSIFY_SCRIPT)
+    except Exception:
+        return UNKNOWN
+    if marker in _MARKER_STATES:
+        return _MARKER_STATES[marker]
+    if marker == 'banner' or BANNER_ATTENDANCE_PATH in (url or ''):
+        return BANNER_ATTENDANCE
+    return UNKNOWN
+
+
+def is_ms_login_url(url):
+    return any(host in (url or '') for host in MS_LOGIN_HOSTS)
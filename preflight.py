@@ -0,0 +1,127 @@
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger("attendance_bot")
+
+
+class PreflightCheck:
+    """One startup check; gating checks must pass before anything is scheduled.
+
+    ``on_done(result)``, if given, runs on the check's thread once its result is final.
+    """
+
+    def __init__(self, name, func, timeout, gating=True, on_done=None):
+        self.name = name
+        self.func = func
+        self.timeout = timeout
+        self.gating = gating
+        self.on_done = on_done
+
+
+class PreflightResult:
+    def __init__(self, check):
+        self.name = check.name
+        self.gating = check.gating
+        self.ok = False
+        self.value = None
+        self.error = None
+        self.elapsed = None
+        self.timed_out = False
+        self.finalized = False
+        self._lock = threading.Lock()
+
+    def finish(self, ok, value=None, error=None, elapsed=None, timed_out=False):
+        """Record the outcome once; returns False if it was already final (e.g. timed out)."""
+        with self._lock:
+            if self.finalized:
+                return False
+            self.ok = ok
+            self.value = value
+            self.error = error
+            self.elapsed = elapsed
+            self.timed_out = timed_out
+            self.finalized = True
+            return True
+
+
+def run_preflight(checks):
+    """Run all checks concurrently, each bounded by its own timeout.
+
+    Only gating checks are waited for. Non-gating ones keep running in the
+    background, are logged when they finish (or time out), and call their
+    ``on_done``; until then their result reads as pending. A check that
+    finishes after its timeout cannot change the recorded result.
+
+    Checks run on daemon threads so one that hangs (a network call with no
+    timeout) cannot keep the interpreter alive. ``sys.exit`` inside a check is
+    reported as a failure rather than ending the process from a worker thread.
+    Returns results in the order the checks were given.
+    """
+    results = []
+    threads = []
+    started = time.monotonic()
+    for check in checks:
+        result = PreflightResult(check)
+
+        def completed(check=check, result=result):
+            if not check.gating:
+                status = 'ok' if result.ok else result.error
+                logger.info(f"Preflight {result.name}: {status} ({result.elapsed:.2f}s)")
+            if check.on_done is not None:
+                check.on_done(result)
+
+        def target(check=check, result=result, completed=completed):
+            t0 = time.monotonic()
+            try:
+                outcome = dict(ok=True, value=check.func())
+            except SystemExit as e:
+                outcome = dict(ok=False, error=f"exited with status {e.code}")
+            except Exception as e:
+                outcome = dict(ok=False, error=str(e))
+            if result.finish(elapsed=time.monotonic() - t0, **outcome):
+                completed()
+
+        def expire(check=check, result=result, completed=completed):
+            if result.finish(False, error=f"timed out after {check.timeout}s",
+                             elapsed=time.monotonic() - started, timed_out=True):
+                completed()
+
+        thread = threading.Thread(target=target, name=f"preflight-{check.name}", daemon=True)
+        thread.start()
+        results.append(result)
+        threads.append((check, thread, result))
+        if not check.gating:
+            timer = threading.Timer(check.timeout, expire)
+            timer.daemon = True
+            timer.start()
+
+    for check, thread, result in threads:
+        if not check.gating:
+            continue
+        remaining = check.timeout - (time.monotonic() - started)
+        thread.join(timeout=max(remaining, 0))
+        if thread.is_alive():
+            result.finish(False, error=f"timed out after {check.timeout}s",
+                          elapsed=time.monotonic() - started, timed_out=True)
+    return results
+
+
+def format_report(results):
+    """Plain-text timing table, printed before the Rich display takes over the screen."""
+    name_width = max([len(r.name) for r in results] + [5])
+    lines = [f"{'Check':<{name_width}}  {'Status':<8}  {'Time':>7}  Note"]
+    for r in results:
+        if not r.finalized:
+            lines.append(f"{r.name:<{name_width}}  {'running':<8}  {'-':>7}  non-blocking, logged when done")
+            continue
+        status = 'ok' if r.ok else ('timeout' if r.timed_out else 'failed')
+        elapsed = f"{r.elapsed:.2f}s" if r.elapsed is not None else '-'
+        note = r.error or ('' if r.gating else 'non-blocking')
+        lines.append(f"{r.name:<{name_width}}  {status:<8}  {elapsed:>7}  {note}")
+    return "\n".join(lines)
+
+
+def gating_failures(results):
+    return [r for r in results if r.gating and not r.ok]
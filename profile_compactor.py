@@ -0,0 +1,126 @@
+import logging
+import os
+import shutil
+import sqlite3
+import time
+
+# Compact each Chrome profile about once a week; a fresh cache costs one slower page load
+DEFAULT_INTERVAL_SECONDS = 7 * 24 * 60 * 60
+MARKER_FILE = '.last_compaction'
+
+# Per-profile (Default, Profile 1, ...) directories that Chrome rebuilds on demand
+PRUNE_DIRS = (
+    'Cache',
+    'Code Cache',
+    'GPUCache',
+    'Service Worker',
+    'DawnCache',
+    'DawnGraphiteCache',
+    'DawnWebGPUCache',
+)
+# The same, at the top of the user-data dir
+ROOT_PRUNE_DIRS = ('ShaderCache', 'GrShaderCache', 'GraphiteDawnCache', 'component_crx_cache')
+# SQLite stores that only hold history and autofill data; VACUUM returns their free pages to disk.
+# Cookies and Local Storage carry the Microsoft session and are never touched.
+SQLITE_STORES = ('History', 'Favicons', 'Top Sites', 'Web Data', 'Shortcuts', 'Network Action Predictor')
+
+
+def dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _format_mb(size):
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def chrome_running(user_data_dir):
+    """True if a Chrome (ours or not) holds the profile lock."""
+    lock = os.path.join(user_data_dir, 'SingletonLock')
+    if os.path.lexists(lock):
+        # Linux/macOS: a symlink to "<hostname>-<pid>", left behind if Chrome was killed
+        try:
+            pid = int(os.readlink(lock).rsplit('-', 1)[1])
+        except (OSError, ValueError, IndexError):
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            return True
+        return True
+    # Windows keeps an open 'lockfile' while Chrome runs
+    return os.path.exists(os.path.join(user_data_dir, 'lockfile'))
+
+
+def compaction_due(user_data_dir, interval_seconds=DEFAULT_INTERVAL_SECONDS):
+    if not os.path.isdir(user_data_dir):
+        return False
+    try:
+        last = os.path.getmtime(os.path.join(user_data_dir, MARKER_FILE))
+    except OSError:
+        return True
+    return time.time() - last >= interval_seconds
+
+
+def _profile_dirs(user_data_dir):
+    for entry in os.scandir(user_data_dir):
+        if entry.is_dir() and (entry.name == 'Default' or entry.name.startswith('Profile ')):
+            yield entry.path
+
+
+def _vacuum(path):
+    conn = sqlite3.connect(path, timeout=1, isolation_level=None)
+    try:
+        conn.execute('VACUUM')
+    finally:
+        conn.close()
+
+
+def compact_profile(user_data_dir, logger=None):
+    """Delete Chrome's caches and VACUUM its history databases; returns (bytes_before, bytes_after).
+
+    The caller must make sure no driver is using ``user_data_dir``. Returns None
+    if Chrome still holds the profile lock.
+    """
+    logger = logger or logging.getLogger("attendance_bot")
+    if chrome_running(user_data_dir):
+        logger.info(f"Skipping compaction of {user_data_dir}: Chrome is still using it.")
+        return None
+    before = dir_size(user_data_dir)
+    pruned = 0
+    vacuumed = 0
+    targets = [os.path.join(user_data_dir, name) for name in ROOT_PRUNE_DIRS]
+    for profile_dir in _profile_dirs(user_data_dir):
+        targets.extend(os.path.join(profile_dir, name) for name in PRUNE_DIRS)
+        for name in SQLITE_STORES:
+            path = os.path.join(profile_dir, name)
+            if not os.path.isfile(path):
+                continue
+            try:
+                _vacuum(path)
+                vacuumed += 1
+            except sqlite3.Error as e:
+                logger.warning(f"Could not vacuum {path}: {e}")
+    for path in targets:
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+            pruned += 1
+    after = dir_size(user_data_dir)
+    try:
+        with open(os.path.join(user_data_dir, MARKER_FILE), 'w') as f:
+            f.write(str(int(time.time())))
+    except OSError as e:
+        logger.warning(f"Failed to record compaction time: {e}")
+    logger.info(
+        f"Compacted Chrome profile {user_data_dir}: {_format_mb(before)} -> {_format_mb(after)} "
+        f"({pruned} cache directories removed, {vacuumed} databases vacuumed)."
+    )
+    return before, after
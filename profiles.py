@@ -0,0 +1,64 @@
+import json
+import os
+
+CREDENTIALS_FILE = 'credentials.json'
+OTP_CONFIG_FILE = '2fa_config.json'
+USER_DATA_DIRNAME = 'chrome_user_data'
+
+
+class Profile:
+    """One student's files: credentials, authenticator secret, ics/ folder and Chrome profile.
+
+    ``key`` is None for the classic single-profile layout next to the script,
+    otherwise the profile's directory name.
+    """
+
+    def __init__(self, key, root_dir):
+        self.key = key
+        self.root_dir = root_dir
+        self.credentials_path = os.path.join(root_dir, CREDENTIALS_FILE)
+        self.otp_config_path = os.path.join(root_dir, OTP_CONFIG_FILE)
+        self.user_data_dir = os.path.join(root_dir, USER_DATA_DIRNAME)
+
+    def load_credentials(self):
+        try:
+            with open(self.credentials_path, 'r') as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    @property
+    def nickname(self):
+        creds = self.load_credentials() or {}
+        return creds.get('profile_nickname') or self.key or "Not set"
+
+    def is_complete(self):
+        creds = self.load_credentials() or {}
+        return bool(creds.get('username') and creds.get('password')) and os.path.exists(self.otp_config_path)
+
+
+def default_profile(script_dir):
+    return Profile(None, script_dir)
+
+
+def load_profiles(profiles_dir):
+    """Return a Profile for each subdirectory of ``profiles_dir`` that has credentials and a bound authenticator.
+
+    Layout per profile: credentials.json, 2fa_config.json, ics/<one .ics>, and
+    chrome_user_data/ (created on first launch).
+    """
+    if not os.path.isdir(profiles_dir):
+        raise RuntimeError(f"profiles directory not found: {profiles_dir}")
+    profiles = []
+    skipped = []
+    for entry in sorted(os.scandir(profiles_dir), key=lambda e: e.name):
+        if not entry.is_dir() or entry.name.startswith('.'):
+            continue
+        profile = Profile(entry.name, entry.path)
+        if profile.is_complete():
+            profiles.append(profile)
+        else:
+            skipped.append(entry.name)
+    if not profiles:
+        raise RuntimeError(f"no complete profiles in {profiles_dir}")
+    return profiles, skipped
@@ -0,0 +1,144 @@
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+
+# Selenium/W3C default for execute_async_script
+DEFAULT_SCRIPT_TIMEOUT = 30
+
+# Evaluates every candidate inside the page in one WebDriver round-trip. If none
+# matches yet, a MutationObserver re-checks on each DOM change until the deadline,
+# so the browser does the polling instead of Python.
+_PROBE_SCRIPT = """
+const candidates = arguments[0];
+const timeoutMs = arguments[1];
+const done = arguments[arguments.length - 1];
+
+function usable(el) {
+    if (!el || el.disabled || el.getAttribute('aria-disabled') === 'true') return false;
+    if (!el.getClientRects().length) return false;
+    const rect = el.getBoundingClientRect();
+    if (rect.width === 0 || rect.height === 0) return false;
+    // Parked outside the page (Microsoft's moveOffScreen inputs): scrolling can never reach it
+    const root = document.documentElement;
+    const left = rect.left + window.scrollX, top = rect.top + window.scrollY;
+    const pageWidth = Math.max(root.scrollWidth, window.innerWidth);
+    const pageHeight = Math.max(root.scrollHeight, window.innerHeight);
+    if (left + rect.width <= 0 || top + rect.height <= 0 || left >= pageWidth || top >= pageHeight) return false;
+    const style = window.getComputedStyle(el);
+    if (style.visibility === 'hidden' || style.display === 'none' || style.pointerEvents === 'none') return false;
+    // Opacity is not inherited in computed style, so check the ancestors too
+    for (let node = el; node && node.nodeType === 1; node = node.parentElement) {
+        if (parseFloat(window.getComputedStyle(node).opacity) === 0) return false;
+    }
+    return true;
+}
+
+function query(kind, selector) {
+    try {
+        if (kind === 'xpath') {
+            const snap = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            const out = [];
+            for (let i = 0; i < snap.snapshotLength; i++) out.push(snap.snapshotItem(i));
+            return out;
+        }
+        return Array.from(document.querySelectorAll(selector));
+    } catch (e) {
+        return [];
+    }
+}
+
+function findFirst() {
+    for (let i = 0; i < candidates.length; i++) {
+        const found = query(candidates[i][0], candidates[i][1]);
+        for (const el of found) {
+            if (usable(el)) return [el, i];
+        }
+    }
+    return null;
+}
+
+const hit = findFirst();
+if (hit || timeoutMs <= 0) {
+    done(hit);
+} else {
+    let finished = false;
+    const finish = (value) => {
+        if (finished) return;
+        finished = true;
+        observer.disconnect();
+        clearTimeout(timer);
+        done(value);
+    };
+    const observer = new MutationObserver(() => {
+        const h = findFirst();
+        if (h) finish(h);
+    });
+    observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+    const timer = setTimeout(() => finish(findFirst()), timeoutMs);
+}
+"""
+
+
+def _to_probe_selector(by, selector):
+    """Translate a selenium locator into the (kind, selector) pair the probe script understands."""
+    if by == By.XPATH:
+        return ['xpath', selector]
+    if by == By.CSS_SELECTOR:
+        return ['css', selector]
+    if by == By.ID:
+        return ['css', f'[id="{selector}"]']
+    if by == By.NAME:
+        return ['css', f'[name="{selector}"]']
+    if by == By.CLASS_NAME:
+        return ['css', f'.{selector}']
+    if by == By.TAG_NAME:
+        return ['css', selector]
+    raise ValueError(f"Unsupported locator strategy for probe: {by}")
+
+
+def _script_timeout(driver):
+    """The driver's current script timeout in seconds (Selenium's default if it cannot be read)."""
+    try:
+        return driver.timeouts.script
+    except Exception:
+        return DEFAULT_SCRIPT_TIMEOUT
+
+
+def probe(driver, candidates, timeout=0):
+    """Return (element, index) for the first visible, enabled match among (by, selector, label) candidates.
+
+    Candidates are checked in list order; ``timeout`` seconds bounds how long the
+    in-page observer waits for one to appear. Returns (None, None) on no match,
+    including when the page navigates away mid-probe and the script is lost.
+    """
+    payload = [_to_probe_selector(by, sel) for by, sel, _ in candidates]
+    # The driver is reused between events, so leave its script timeout as we found it
+    previous_timeout = _script_timeout(driver)
+    driver.set_script_timeout(timeout + 5)
+    try:
+        result = driver.execute_async_script(_PROBE_SCRIPT, payload, int(timeout * 1000))
+    except WebDriverException:
+        # Timeouts, and the page unloading under the script; the caller re-reads the page
+        return None, None
+    finally:
+        driver.set_script_timeout(previous_timeout)
+    if not result:
+        return None, None
+    return result[0], int(result[1])
+
+
+def click_element(driver, element):
+    """Scroll into view and click, falling back to a JS click when the native one is intercepted."""
+    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
+    try:
+        element.click()
+    except Exception:
+        driver.execute_script("arguments[0].click();", element)
+
+
+def probe_and_click(driver, candidates, timeout=0):
+    """Probe once and click the winner; returns its index or None."""
+    element, index = probe(driver, candidates, timeout)
+    if element is None:
+        return None
+    click_element(driver, element)
+    return index
@@ -0,0 +1,123 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from selector_probe import probe
+
+STATS_FILE = 'selector_stats.json'
+STATS_VERSION = 1
+# Every Nth run of a step uses the original candidate order, so a selector that
+# fell behind can win again after the Microsoft UI changes back
+EXPLORE_EVERY = 10
+
+logger = logging.getLogger("attendance_bot")
+
+
+def _stats_path():
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), STATS_FILE)
+
+
+class SelectorStats:
+    """Per-step hit/miss and time-to-match for login selector candidates, persisted between runs.
+
+    Candidates are identified by their label, which must be unique within a step.
+    """
+
+    def __init__(self, path=None, explore_every=EXPLORE_EVERY):
+        self.path = path or _stats_path()
+        self.explore_every = explore_every
+        self._lock = threading.Lock()
+        self._steps = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == STATS_VERSION:
+                return data.get('steps', {})
+        except Exception:
+            pass
+        return {}
+
+    def _save(self):
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({'version': STATS_VERSION, 'steps': self._steps}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to save selector stats: {e}")
+
+    def _step(self, step):
+        return self._steps.setdefault(step, {'runs': 0, 'last_winner': None, 'candidates': {}})
+
+    def order(self, step, candidates):
+        """Return ``candidates`` reordered: last winner first, then by success rate and match time."""
+        with self._lock:
+            entry = self._step(step)
+            entry['runs'] += 1
+            if self.explore_every and entry['runs'] % self.explore_every == 0:
+                return list(candidates)
+            seen = entry['candidates']
+            last_winner = entry['last_winner']
+
+            def score(item):
+                position, (_, _, label) = item
+                stats = seen.get(label, {})
+                hits, misses = stats.get('hits', 0), stats.get('misses', 0)
+                rate = (hits + 1) / (hits + misses + 2)
+                avg_ms = stats.get('match_ms', 0) / hits if hits else float('inf')
+                return (label != last_winner, -rate, avg_ms, position)
+
+            return [c for _, c in sorted(enumerate(candidates), key=score)]
+
+    def record(self, step, ordered, winner_index, elapsed):
+        """Count a hit for the winner and a miss for every candidate ordered before it (all of them if none won)."""
+        with self._lock:
+            entry = self._step(step)
+            losers = ordered if winner_index is None else ordered[:winner_index]
+            for _, _, label in losers:
+                stats = entry['candidates'].setdefault(label, {'hits': 0, 'misses': 0, 'match_ms': 0})
+                stats['misses'] += 1
+            if winner_index is not None:
+                label = ordered[winner_index][2]
+                stats = entry['candidates'].setdefault(label, {'hits': 0, 'misses': 0, 'match_ms': 0})
+                stats['hits'] += 1
+                stats['match_ms'] += int(elapsed * 1000)
+                entry['last_winner'] = label
+            self._save()
+
+    def record_failure(self, step, label):
+        """Demote a candidate that matched but whose click did not lead anywhere."""
+        with self._lock:
+            entry = self._step(step)
+            stats = entry['candidates'].setdefault(label, {'hits': 0, 'misses': 0, 'match_ms': 0})
+            stats['misses'] += 1
+            if entry['last_winner'] == label:
+                entry['last_winner'] = None
+            self._save()
+
+    def probe(self, driver, step, candidates, timeout=0):
+        """Probe in learned order and record the outcome; returns (element, candidate) or (None, None)."""
+        ordered = self.order(step, candidates)
+        started = time.monotonic()
+        element, index = probe(driver, ordered, timeout)
+        self.record(step, ordered, index, time.monotonic() - started)
+        if element is None:
+            return None, None
+        return element, ordered[index]
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_selector_stats():
+    """Process-wide store shared by every login flow."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = SelectorStats()
+        return _default
@@ -0,0 +1,68 @@
+import logging
+import random
+import time
+
+DEFAULT_INTERVAL_SECONDS = 40 * 60
+DEFAULT_JITTER = 0.25
+# Only keep the session alive when an event is coming up within this horizon
+DEFAULT_HORIZON_SECONDS = 6 * 60 * 60
+# Leave the browser alone this close to a trigger; the pre-warm takes over from here
+DEFAULT_QUIET_SECONDS = 10 * 60
+
+
+class SessionKeepalive:
+    """Touch the attendance page now and then so the login is still valid at event time.
+
+    Microsoft and Banner sessions slide forward on activity; a lapsed one is
+    renewed here, off the critical path, instead of inside the lecture window.
+    ``touch(driver)`` does the page visit (and login if needed), ``next_trigger()``
+    returns the epoch time of the next trigger or None. The driver is taken
+    without blocking, so an attendance run in progress is never delayed.
+    """
+
+    def __init__(self, session, touch, next_trigger, interval_seconds=DEFAULT_INTERVAL_SECONDS,
+                 jitter=DEFAULT_JITTER, horizon_seconds=DEFAULT_HORIZON_SECONDS,
+                 quiet_seconds=DEFAULT_QUIET_SECONDS, logger=None):
+        self.session = session
+        self.touch = touch
+        self.next_trigger = next_trigger
+        self.interval_seconds = interval_seconds
+        self.jitter = jitter
+        self.horizon_seconds = horizon_seconds
+        self.quiet_seconds = quiet_seconds
+        self.logger = logger or logging.getLogger("attendance_bot")
+
+    def _next_delay(self):
+        return self.interval_seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def tick(self):
+        """Touch the session once if an event is near but not imminent; returns True if it ran."""
+        trigger = self.next_trigger()
+        if trigger is None:
+            return False
+        lead = trigger - time.time()
+        if lead > self.horizon_seconds or lead < self.quiet_seconds:
+            return False
+        driver = self.session.acquire(blocking=False)
+        if driver is None:
+            return False
+        driver_broken = False
+        try:
+            if self.touch(driver):
+                self.logger.info("Keepalive: attendance session is valid.")
+            else:
+                self.logger.warning("Keepalive: could not confirm the attendance session; the pre-warm will retry.")
+            return True
+        except Exception as e:
+            self.logger.warning(f"Keepalive failed: {e}")
+            driver_broken = True
+            return True
+        finally:
+            self.session.release(discard=driver_broken)
+
+    def run(self, exit_event):
+        while not exit_event.wait(timeout=self._next_delay()):
+            try:
+                self.tick()
+            except Exception as e:
+                self.logger.error(f"Keepalive error: {e}", exc_info=True)
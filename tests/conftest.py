@@ -0,0 +1,72 @@
+import os
+import sys
+import types
+
+# Tests import the bot's modules from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _install(name, **attrs):
+    """Register a placeholder module (and its parents) unless the real one is importable."""
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    parent, _, child = name.rpartition('.')
+    if parent:
+        if parent not in sys.modules:
+            _install(parent)
+        setattr(sys.modules[parent], child, module)
+    return module
+
+
+def _unavailable(*args, **kwargs):
+    raise RuntimeError("selenium is not installed; tests must not drive a real browser")
+
+
+# The login logic only needs selenium's names at import time; every test
+# replaces the driver-facing calls, so CI can run without a browser stack.
+try:
+    import selenium  # noqa: F401
+except ImportError:
+    class WebDriverException(Exception):
+        pass
+
+    class TimeoutException(WebDriverException):
+        pass
+
+    class NoSuchElementException(WebDriverException):
+        pass
+
+    class StaleElementReferenceException(WebDriverException):
+        pass
+
+    class ElementClickInterceptedException(WebDriverException):
+        pass
+
+    class By:
+        ID = 'id'
+        NAME = 'name'
+        XPATH = 'xpath'
+        CSS_SELECTOR = 'css selector'
+        CLASS_NAME = 'class name'
+        TAG_NAME = 'tag name'
+
+    _install(
+        'selenium.common.exceptions',
+        WebDriverException=WebDriverException,
+        TimeoutException=TimeoutException,
+        NoSuchElementException=NoSuchElementException,
+        StaleElementReferenceException=StaleElementReferenceException,
+        ElementClickInterceptedException=ElementClickInterceptedException,
+    )
+    _install('selenium.webdriver.common.by', By=By)
+    _install('selenium.webdriver.support.ui', WebDriverWait=_unavailable, Select=_unavailable)
+    _install('selenium.webdriver.support.expected_conditions')
+    _install('selenium.webdriver.chrome.options', Options=_unavailable)
+    _install('selenium.webdriver.chrome.service', Service=_unavailable)
+    sys.modules['selenium.webdriver'].Chrome = _unavailable
+
+try:
+    import pyotp  # noqa: F401
+except ImportError:
+    _install('pyotp', TOTP=_unavailable)
@@ -0,0 +1,51 @@
+import pytest
+
+import auto_login
+
+
+class FakeStats:
+    """Answers probes from a {step: element} map, like a page that shows only those fields."""
+
+    def __init__(self, visible):
+        self.visible = visible
+        self.probed = []
+
+    def probe(self, driver, step, candidates, timeout=0):
+        self.probed.append(step)
+        element = self.visible.get(step)
+        return element, (candidates[0] if element is not None else None)
+
+
+@pytest.fixture
+def filled(monkeypatch):
+    calls = []
+    monkeypatch.setattr(auto_login, 'click_with_retries', lambda *args, **kwargs: None)
+    monkeypatch.setattr(auto_login, 'maybe_switch_to_login_iframe', lambda driver: None)
+    monkeypatch.setattr(auto_login, 'wait_after_submit', lambda *args, **kwargs: None)
+    monkeypatch.setattr(auto_login, '_fill_input', lambda driver, element, value: calls.append((element, value)))
+    return calls
+
+
+def test_password_page_fills_password_not_hidden_username(monkeypatch, filled):
+    # The loginfmt input is still in the DOM off-screen; the probe must not pick it
+    stats = FakeStats({'password_input': 'password-field'})
+    monkeypatch.setattr(auto_login, 'get_selector_stats', lambda: stats)
+
+    assert auto_login.fill_ms_login(object(), 'user@example.com', 'secret')
+    assert filled == [('password-field', 'secret')]
+    assert stats.probed == ['password_input']
+
+
+def test_username_page_fills_username_then_password(monkeypatch, filled):
+    stats = FakeStats({'username_input': 'username-field'})
+    monkeypatch.setattr(auto_login, 'get_selector_stats', lambda: stats)
+
+    def reveal_password(*args, **kwargs):
+        # Submitting the username is what brings up the password field
+        if filled:
+            stats.visible['password_input'] = 'password-field'
+
+    monkeypatch.setattr(auto_login, 'click_with_retries', reveal_password)
+
+    assert auto_login.fill_ms_login(object(), 'user@example.com', 'secret')
+    assert filled == [('username-field', 'user@example.com'), ('password-field', 'secret')]
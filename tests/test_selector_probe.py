@@ -0,0 +1,33 @@
+from selenium.common.exceptions import WebDriverException
+
+import selector_probe
+
+
+class FakeDriver:
+    def __init__(self, error=None, result=None):
+        self.error = error
+        self.result = result
+        self.script_timeouts = []
+
+    def set_script_timeout(self, seconds):
+        self.script_timeouts.append(seconds)
+
+    def execute_async_script(self, script, *args):
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+CANDIDATES = [('id', 'idSIButton9', 'primary')]
+
+
+def test_page_unloading_mid_probe_is_no_match():
+    driver = FakeDriver(error=WebDriverException('document unloaded while waiting for result'))
+    assert selector_probe.probe(driver, CANDIDATES, timeout=1) == (None, None)
+    # The script timeout is put back even though the call failed
+    assert driver.script_timeouts == [6, selector_probe.DEFAULT_SCRIPT_TIMEOUT]
+
+
+def test_match_returns_element_and_index():
+    driver = FakeDriver(result=['element', 0])
+    assert selector_probe.probe(driver, CANDIDATES) == ('element', 0)
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+import selector_stats
+from selector_stats import SelectorStats
+
+CANDIDATES = [
+    ('id', 'idSIButton9', 'primary'),
+    ('xpath', '//input[@type="submit"]', 'submit'),
+    ('css selector', 'button.win-button', 'button'),
+]
+
+
+def labels(ordered):
+    return [label for _, _, label in ordered]
+
+
+@pytest.fixture
+def stats(tmp_path):
+    return SelectorStats(path=str(tmp_path / 'selector_stats.json'))
+
+
+def test_order_without_history_keeps_given_order(stats):
+    assert stats.order('next', CANDIDATES) == CANDIDATES
+
+
+def test_last_winner_is_promoted(stats):
+    stats.record('next', CANDIDATES, 2, 0.05)
+    assert labels(stats.order('next', CANDIDATES)) == ['button', 'primary', 'submit']
+
+
+def test_record_counts_misses_before_winner(stats):
+    stats.record('next', CANDIDATES, 1, 0.25)
+    seen = stats._steps['next']['candidates']
+    assert seen['primary'] == {'hits': 0, 'misses': 1, 'match_ms': 0}
+    assert seen['submit'] == {'hits': 1, 'misses': 0, 'match_ms': 250}
+    assert 'button' not in seen
+    assert stats._steps['next']['last_winner'] == 'submit'
+
+
+def test_record_without_winner_misses_everything(stats):
+    stats.record('next', CANDIDATES, None, 1.0)
+    seen = stats._steps['next']['candidates']
+    assert all(seen[label]['misses'] == 1 for label in labels(CANDIDATES))
+    assert stats._steps['next']['last_winner'] is None
+
+
+def test_better_success_rate_wins_once_no_last_winner(stats):
+    for _ in range(3):
+        stats.record('next', CANDIDATES, 2, 0.05)
+    stats.record_failure('next', 'button')
+    # 'button' lost its last-winner spot but still has the best hit rate
+    assert stats._steps['next']['last_winner'] is None
+    assert labels(stats.order('next', CANDIDATES))[0] == 'button'
+
+
+def test_record_failure_demotes_last_winner(stats):
+    stats.record('next', CANDIDATES, 2, 0.05)
+    for _ in range(4):
+        stats.record_failure('next', 'button')
+    # 1 hit / 4 misses now rates below the others' 0 hits / 1 miss
+    assert labels(stats.order('next', CANDIDATES)) == ['primary', 'submit', 'button']
+
+
+def test_every_nth_run_explores_original_order(tmp_path):
+    stats = SelectorStats(path=str(tmp_path / 'selector_stats.json'), explore_every=3)
+    stats.record('next', CANDIDATES, 2, 0.05)
+    orders = [labels(stats.order('next', CANDIDATES)) for _ in range(6)]
+    learned = ['button', 'primary', 'submit']
+    original = labels(CANDIDATES)
+    assert orders == [learned, learned, original, learned, learned, original]
+
+
+def test_default_explores_every_tenth_run(stats):
+    stats.record('next', CANDIDATES, 2, 0.05)
+    orders = [labels(stats.order('next', CANDIDATES)) for _ in range(selector_stats.EXPLORE_EVERY)]
+    assert orders[-1] == labels(CANDIDATES)
+    assert all(order[0] == 'button' for order in orders[:-1])
+
+
+def test_stats_persist_between_instances(tmp_path):
+    path = str(tmp_path / 'selector_stats.json')
+    SelectorStats(path=path).record('next', CANDIDATES, 1, 0.1)
+    assert labels(SelectorStats(path=path).order('next', CANDIDATES))[0] == 'submit'
+
+
+def test_other_version_is_ignored(tmp_path):
+    path = tmp_path / 'selector_stats.json'
+    path.write_text(json.dumps({'version': selector_stats.STATS_VERSION + 1,
+                                'steps': {'next': {'runs': 0, 'last_winner': 'button', 'candidates': {}}}}))
+    assert SelectorStats(path=str(path)).order('next', CANDIDATES) == CANDIDATES
+
+
+def test_probe_records_outcome(monkeypatch, stats):
+    stats.record('next', CANDIDATES, 2, 0.05)
+    monkeypatch.setattr(selector_stats, 'probe', lambda driver, ordered, timeout: ('element', 1))
+
+    # Learned order is button, primary, submit, so index 1 is 'primary'
+    assert stats.probe(object(), 'next', CANDIDATES) == ('element', CANDIDATES[0])
+    assert stats._steps['next']['last_winner'] == 'primary'
+    assert stats._steps['next']['candidates']['button']['misses'] == 1
+
+
+def test_probe_without_match(monkeypatch, stats):
+    monkeypatch.setattr(selector_stats, 'probe', lambda driver, ordered, timeout: (None, None))
+    assert stats.probe(object(), 'next', CANDIDATES) == (None, None)
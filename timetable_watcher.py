@@ -0,0 +1,86 @@
+import logging
+import os
+import threading
+import time
+
+DEFAULT_POLL_SECONDS = 30
+
+
+def diff_events(old_records, new_records, now=None):
+    """Diff two (start_epoch, end_epoch, name) lists keyed on (start, name).
+
+    Returns (added, removed, changed) where changed holds new records whose end
+    time moved. Events already started are ignored on both sides so a reload
+    never cancels one that is waiting for its post-start trigger.
+    """
+    now = time.time() if now is None else now
+    old = {(start, name): (start, end, name) for start, end, name in old_records if start > now}
+    new = {(start, name): (start, end, name) for start, end, name in new_records if start > now}
+    added = [new[key] for key in new.keys() - old.keys()]
+    removed = [old[key] for key in old.keys() - new.keys()]
+    changed = [new[key] for key in new.keys() & old.keys() if new[key][1] != old[key][1]]
+    return sorted(added), sorted(removed), sorted(changed)
+
+
+class TimetableWatcher:
+    """Poll the ics/ folder and push timetable edits into the running schedule.
+
+    The standard library has no portable inotify binding, so this polls the
+    folder's (name, mtime, size) signature; a change must hold for one extra
+    poll before reloading so half-written files are never parsed.
+    """
+
+    def __init__(self, ics_folder, records, load, on_change, poll_seconds=DEFAULT_POLL_SECONDS, logger=None):
+        self.ics_folder = ics_folder
+        self.records = list(records)
+        self.load = load
+        self.on_change = on_change
+        self.poll_seconds = poll_seconds
+        self.logger = logger or logging.getLogger("attendance_bot")
+        self._signature = self._scan()
+        self._pending = None
+
+    def _scan(self):
+        try:
+            entries = sorted(
+                (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                for entry in os.scandir(self.ics_folder)
+                if entry.name.endswith('.ics') and entry.is_file()
+            )
+        except OSError:
+            return None
+        return tuple(entries)
+
+    def poll(self):
+        """Check once; returns True if a reload was applied."""
+        signature = self._scan()
+        if signature == self._signature:
+            self._pending = None
+            return False
+        if signature != self._pending:
+            self._pending = signature
+            return False
+        self._signature, self._pending = signature, None
+        if not signature or len(signature) != 1:
+            self.logger.warning("Timetable folder changed but does not hold exactly one .ics file; ignoring.")
+            return False
+        new_records = self.load(os.path.join(self.ics_folder, signature[0][0]))
+        if new_records is None:
+            return False
+        added, removed, changed = diff_events(self.records, new_records)
+        self.records = list(new_records)
+        if added or removed or changed:
+            self.logger.info(
+                f"Timetable reloaded: {len(added)} added, {len(removed)} removed, {len(changed)} changed."
+            )
+            self.on_change(added, removed, changed)
+        else:
+            self.logger.info("Timetable file changed but no upcoming events differ.")
+        return True
+
+    def run(self, exit_event):
+        while not exit_event.wait(timeout=self.poll_seconds):
+            try:
+                self.poll()
+            except Exception as e:
+                self.logger.error(f"Timetable reload failed: {e}", exc_info=True)
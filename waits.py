@@ -0,0 +1,78 @@
+import time
+
+from selenium.common.exceptions import (
+    ElementClickInterceptedException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Upper bounds (seconds) per login/attendance step; waits return as soon as the page moves on
+STEP_BUDGETS = {
+    'username_submit': 15,
+    'password_submit': 20,
+    'kmsi_checkbox': 3,
+    'kmsi_submit': 15,
+    'otp_submit': 20,
+    'security_info_navigation': 60,
+    'security_info_step': 20,
+    'attendance_confirm': 15,
+}
+POLL_FREQUENCY = 0.1
+
+
+def capped(budget, deadline=None):
+    """``budget`` seconds, cut short so the wait cannot run past ``deadline`` (epoch seconds)."""
+    if deadline is None:
+        return budget
+    return max(0, min(budget, deadline - time.time()))
+
+
+def wait_until(driver, condition, budget, poll_frequency=POLL_FREQUENCY):
+    """Like WebDriverWait.until, but returns None on timeout instead of raising."""
+    try:
+        return WebDriverWait(driver, budget, poll_frequency=poll_frequency).until(condition)
+    except TimeoutException:
+        return None
+
+
+def _gone(element):
+    try:
+        return not element.is_displayed()
+    except StaleElementReferenceException:
+        return True
+
+
+def page_left(element, old_url):
+    """Condition: the submitted element went stale/hidden or the URL changed."""
+    def condition(driver):
+        return driver.current_url != old_url or _gone(element)
+    return condition
+
+
+def wait_after_submit(driver, element, step, deadline=None):
+    """Block until the page reacts to a submit of ``element``, bounded by the step budget and ``deadline``."""
+    old_url = driver.current_url
+    return wait_until(driver, page_left(element, old_url), capped(STEP_BUDGETS[step], deadline)) is not None
+
+
+def wait_for_selected(driver, element, step, deadline=None):
+    return wait_until(driver, lambda d: element.is_selected(), capped(STEP_BUDGETS[step], deadline)) is not None
+
+
+def click_when_ready(driver, locator, step):
+    """Click ``locator`` as soon as it is visible and not covered by an animating overlay."""
+    def attempt(d):
+        try:
+            element = d.find_element(*locator)
+            if element.is_displayed() and element.is_enabled():
+                element.click()
+                return element
+        except (ElementClickInterceptedException, StaleElementReferenceException, NoSuchElementException):
+            return None
+        return None
+    element = wait_until(driver, attempt, STEP_BUDGETS[step])
+    if element is None:
+        raise TimeoutException(f"{locator[1]} not clickable within {STEP_BUDGETS[step]}s")
+    return element